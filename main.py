@@ -1,27 +1,74 @@
 # pylint: disable=global-statement,redefined-outer-name
 import argparse
+import contextlib
+import fnmatch
+import io
+import json
 import os
-from typing import Any, Dict
+import sys
+import time
+from collections import defaultdict
+from typing import Any, BinaryIO, DefaultDict, Dict, List, Optional
 from urllib.parse import quote_plus
 
-from flask import Flask, jsonify, redirect, render_template, send_from_directory
-from flask_frozen import Freezer
+from flask import Flask, abort, redirect, send_from_directory
 from flaskext.markdown import Markdown
+from werkzeug.exceptions import HTTPException
 
-from miniconf.load_site_data import load_site_data
+from miniconf import assets, markup, responses, snapshot, templating
+from miniconf.exports import ExportRegistry
+from miniconf.load_site_data import LazySiteData, load_site_data, reload_site_data
+from miniconf.render import can_render, json_view, templated, write_page
 from miniconf.site_data import Paper, PlenarySession, Tutorial, Workshop
 
-site_data: Dict[str, Any] = {}
-by_uid: Dict[str, Any] = {}
+# Built on first access by the dev server and `--render`, see `LazySiteData`.
+site_data: Dict[str, Any] = LazySiteData()
+by_uid: Dict[str, Any] = LazySiteData()
 
 # ------------- SERVER CODE -------------------->
 
 app = Flask(__name__)
 app.config.from_object(__name__)
-freezer = Freezer(app)
-markdown = Markdown(app)
+Markdown(app)
+markdown = markup.init_app(app)
+response_cache = responses.init_app(app)
 
 app.jinja_env.filters["quote_plus"] = quote_plus
+assets.init_app(app)
+templating.init_app(app)
+app.config.setdefault(
+    "SITE_DATA_CACHE_DIR", os.path.join(app.root_path, snapshot.SNAPSHOT_DIRECTORY)
+)
+
+# The datasets that are published as JSON files. The raw rows of the sitedata
+# files are only used to build the other datasets and are not published.
+json_exports = ExportRegistry()
+json_exports.register("papers", "papers.json", "serve_papers.json")
+for dataset in [
+    "config",
+    "committee",
+    "calendar",
+    "event_types",
+    "tutorial_calendar",
+    "plenary_sessions",
+    "plenary_session_days",
+    "programs",
+    "tutorials",
+    "workshops",
+    "socials",
+    "tracks",
+    "main_program_tracks",
+    "papers_projection",
+    "faq",
+    "code_of_conduct",
+    "sponsors",
+    "sponsors_by_level",
+    "sponsor_levels",
+    "qa_sessions",
+    "qa_session_days",
+    "qa_sessions_by_day",
+]:
+    json_exports.register(dataset, f"serve_{dataset}.json")
 
 # MAIN PAGES
 
@@ -40,120 +87,135 @@ def index():
 
 
 @app.route("/index.html")
+@templated("index.html")
 def home():
     data = _data()
-    return render_template("index.html", **data)
+    return data
 
 
 @app.route("/about.html")
+@templated("about.html")
 def about():
     data = _data()
     data["FAQ"] = site_data["faq"]
     data["CodeOfConduct"] = site_data["code_of_conduct"]
-    return render_template("about.html", **data)
+    return data
 
 
 @app.route("/papers.html")
+@templated("papers.html")
 def papers():
     data = _data()
     # The data will be loaded from `papers.json`.
     # See the `papers_json()` method and `static/js/papers.js`.
     data["tracks"] = site_data["main_program_tracks"]
     data["workshop_names"] = [wsh.title for wsh in site_data["workshops"]]
-    return render_template("papers.html", **data)
+    return data
 
 
 @app.route("/papers_vis.html")
+@templated("papers_vis.html")
 def papers_vis():
     data = _data()
     # The data will be loaded from `papers.json`.
     # See the `papers_json()` method and `static/js/papers.js`.
     data["tracks"] = site_data["main_program_tracks"] + ["System Demonstrations"]
-    return render_template("papers_vis.html", **data)
+    return data
 
 
 @app.route("/papers_keyword_vis.html")
+@templated("papers_keyword_vis.html")
 def papers_keyword_vis():
     data = _data()
     # The data will be loaded from `papers.json`.
     # See the `papers_json()` method and `static/js/papers.js`.
     data["tracks"] = site_data["tracks"]
-    return render_template("papers_keyword_vis.html", **data)
+    return data
 
 
 @app.route("/schedule.html")
+@templated("schedule.html")
 def schedule():
     data = _data()
     data["calendar"] = site_data["calendar"]
     data["event_types"] = site_data["event_types"]
-    return render_template("schedule.html", **data)
+    return data
 
 
 @app.route("/livestream.html")
+@templated("livestream.html")
 def livestream():
     data = _data()
-    return render_template("livestream.html", **data)
+    return data
 
 
 @app.route("/plenary_sessions.html")
+@templated("plenary_sessions.html")
 def plenary_sessions():
     data = _data()
     data["plenary_sessions"] = site_data["plenary_sessions"]
     data["plenary_session_days"] = site_data["plenary_session_days"]
-    return render_template("plenary_sessions.html", **data)
+    return data
 
 
 @app.route("/qa_sessions.html")
+@templated("qa_sessions.html")
 def qa_sessions():
     data = _data()
     data["qa_session_days"] = site_data["qa_session_days"]
     data["qa_sessions"] = site_data["qa_sessions_by_day"]
 
-    data["papers"] = by_uid["papers"]
-    return render_template("qa_sessions.html", **data)
+    data["papers"] = site_data["index"].papers
+    return data
 
 
 @app.route("/tutorials.html")
+@templated("tutorials.html")
 def tutorials():
     data = _data()
     data["tutorials"] = site_data["tutorials"]
-    return render_template("tutorials.html", **data)
+    return data
 
 
 @app.route("/workshops.html")
+@templated("workshops.html")
 def workshops():
     data = _data()
     data["workshops"] = site_data["workshops"]
-    return render_template("workshops.html", **data)
+    return data
 
 
 @app.route("/sponsors.html")
+@templated("sponsors.html")
 def sponsors():
     data = _data()
     data["sponsors"] = site_data["sponsors_by_level"]
     data["sponsor_levels"] = site_data["sponsor_levels"]
-    return render_template("sponsors.html", **data)
+    return data
 
 
 @app.route("/socials.html")
+@templated("socials.html")
 def socials():
     data = _data()
     data["socials"] = site_data["socials"]
-    return render_template("socials.html", **data)
+    return data
 
 
 @app.route("/organizers.html")
+@templated("organizers.html")
 def organizers():
     data = _data()
 
     data["committee"] = site_data["committee"]
-    return render_template("organizers.html", **data)
+    return data
 
 
 # ITEM PAGES
 
 
 @app.route("/paper_<uid>.html")
+@templated("paper.html")
 def paper(uid):
     data = _data()
 
@@ -165,85 +227,79 @@ def paper(uid):
         by_uid["papers"][ii] for ii in v.content.similar_paper_uids[1:]
     ]
 
-    return render_template("paper.html", **data)
+    return data
 
 
 @app.route("/plenary_session_<uid>.html")
+@templated("plenary_session.html")
 def plenary_session(uid):
     data = _data()
     data["plenary_session"] = by_uid["plenary_sessions"][uid]
-    return render_template("plenary_session.html", **data)
+    return data
 
 
 @app.route("/tutorial_<uid>.html")
+@templated("tutorial.html")
 def tutorial(uid):
     data = _data()
     data["tutorial"] = by_uid["tutorials"][uid]
-    return render_template("tutorial.html", **data)
+    return data
 
 
 @app.route("/workshop_<uid>.html")
+@templated("workshop.html")
 def workshop(uid):
     data = _data()
     data["workshop"] = by_uid["workshops"][uid]
-    return render_template("workshop.html", **data)
+    return data
 
 
 @app.route("/sponsor_<uid>.html")
+@templated("sponsor.html")
 def sponsor(uid):
     data = _data()
-    data["sponsor"] = by_uid["sponsors"][uid]
+    data["sponsor"] = sponsor = by_uid["sponsors"][uid]
     data["papers"] = by_uid["papers"]
-    return render_template("sponsor.html", **data)
+    # Unknown publications only fail this page, e.g. with `--keep-going`.
+    publications: DefaultDict[str, List[Paper]] = defaultdict(list)
+    for paper_id in sponsor.get("publications") or ():
+        paper = by_uid["papers"][paper_id]
+        publications[paper.content.paper_type].append(paper)
+    data["publications"] = publications
+    return data
 
 
 @app.route("/chat.html")
+@templated("chat.html")
 def chat():
     data = _data()
-    return render_template("chat.html", **data)
+    return data
 
 
 # FRONT END SERVING
 
 
 @app.route("/papers.json")
+@response_cache.cached
+@json_view
 def papers_json():
-    all_papers = site_data["papers"]
-
-    return jsonify(all_papers)
+    return site_data["papers"]
 
 
 @app.route("/papers_<program>.json")
+@response_cache.cached
+@json_view
 def papers_program(program):
-    paper: Paper
-    if program == "workshop":
-        papers_for_program = []
-        for wsh in site_data["workshops"]:
-            papers_for_program.extend(wsh.papers)
-    else:
-        papers_for_program = [
-            paper for paper in site_data["papers"] if paper.content.program == program
-        ]
-    return jsonify(papers_for_program)
+    return site_data["index"].papers_by_program.get(program, ())
 
 
 @app.route("/track_<program_name>_<track_name>.json")
+@response_cache.cached
+@json_view
 def track_json(program_name, track_name):
-    paper: Paper
-    if program_name == "workshop":
-        papers_for_track = None
-        for wsh in site_data["workshops"]:
-            if wsh.title == track_name:
-                papers_for_track = wsh.papers
-                break
-    else:
-        papers_for_track = [
-            paper
-            for paper in site_data["papers"]
-            if paper.content.track == track_name
-            and paper.content.program == program_name
-        ]
-    return jsonify(papers_for_track)
+    return site_data["index"].papers_by_program_track.get(
+        (program_name, track_name), ()
+    )
 
 
 @app.route("/static/<path:path>")
@@ -252,15 +308,19 @@ def send_static(path):
 
 
 @app.route("/serve_<path>.json")
+@response_cache.cached
+@json_view
 def serve(path):
-    return jsonify(site_data[path])
+    dataset = json_exports.dataset(f"serve_{path}.json")
+    if dataset is None:
+        abort(404)
+    return site_data[dataset]
 
 
 # --------------- DRIVER CODE -------------------------->
 # Code to turn it all static
 
 
-@freezer.register_generator
 def generator():
 
     paper: Paper
@@ -268,10 +328,11 @@ def generator():
         yield "paper", {"uid": paper.id}
     for program in site_data["programs"]:
         yield "papers_program", {"program": program}
-        for track in site_data["tracks"]:
+        # Only the tracks that have papers in the program
+        for track in site_data["index"].tracks_by_program.get(program, ()):
             yield "track_json", {"track_name": track, "program_name": program}
 
-    yield "papers_program", {"program": "workshop"}
+    # Workshops without papers are listed on papers.html as well
     for wsh in site_data["workshops"]:
         yield "track_json", {"track_name": wsh.title, "program_name": "workshop"}
     plenary_session: PlenarySession
@@ -290,8 +351,143 @@ def generator():
             continue
         yield "sponsor", {"uid": str(sponsor["UID"])}
 
-    for key in site_data:
-        yield "serve", {"path": key}
+    for _, name in json_exports:
+        yield "/" + name
+
+
+def create_freezer():
+    """The Frozen-Flask freezer of the app, which is only needed for builds."""
+    from flask_frozen import Freezer  # pylint: disable=import-outside-toplevel
+
+    freezer = Freezer(app)
+    freezer.register_generator(generator)
+    return freezer
+
+
+def report_unexported_datasets():
+    unexported = [key for key in site_data if key not in json_exports]
+    size = sum(len(json.dumps(site_data[key], default=str)) for key in unexported)
+    print(
+        f"Skipped {len(unexported)} unexported datasets of about {size / 2**20:.1f} MB: "
+        + ", ".join(sorted(unexported))
+    )
+
+
+def render(patterns: List[str], output: Optional[str]) -> None:
+    """Writes the pages at the URLs `patterns` to stdout or to `output`.
+
+    Only the site data the pages need is built, unless a pattern is a glob
+    like "/paper_main.*.html", which is matched against all URLs of a build.
+    """
+    start = time.time()
+    stdout = sys.stdout.buffer
+    # Keep the warnings of the data loading, which continues while the pages
+    # are rendered, out of the pages.
+    with contextlib.redirect_stdout(sys.stderr):
+        urls = _load_render_data(patterns)
+        if not urls:
+            sys.exit(f"No page matches {' '.join(patterns)}")
+        if output is None and len(urls) > 1:
+            sys.exit(f"{len(urls)} pages match, use --output to write them to a folder")
+        for url in urls:
+            _render_page(url, output, stdout)
+
+    print(f"Rendered {len(urls)} pages in {time.time() - start:.2f}s", file=sys.stderr)
+
+
+def _render_page(url: str, output: Optional[str], stdout: BinaryIO) -> None:
+    """Writes the page at `url` to `stdout`, or into the folder `output`."""
+    if output is None:
+        _write_page(url, stdout)
+        stdout.flush()
+        return
+    filename = os.path.join(output, *url.lstrip("/").split("/"))
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, "wb") as out:
+        _write_page(url, out)
+
+
+def _write_page(url: str, out: BinaryIO) -> None:
+    endpoint, values = app.url_map.bind("localhost").match(url)
+    if endpoint != "static" and can_render(app, endpoint):
+        f = io.TextIOWrapper(out, encoding="utf-8", newline="")
+        try:
+            write_page(app, endpoint, values, f)
+        except HTTPException as e:
+            sys.exit(f"{url} returned {e}")
+        except LookupError:
+            # E.g. the KeyError of a view for an unknown uid.
+            sys.exit(f"No page at {url}")
+        finally:
+            f.flush()
+            # Closing the wrapper would close `out`, e.g. stdout.
+            f.detach()
+    else:
+        response = app.test_client().get(url)
+        if response.status_code != 200:
+            sys.exit(f"{url} returned {response.status}")
+        out.write(response.get_data())
+
+
+def _load_render_data(patterns: List[str]) -> List[str]:
+    """Loads the site data for the pages of `patterns` and returns their URLs."""
+    if any(glob_char in pattern for pattern in patterns for glob_char in "*?["):
+        # pylint: disable=import-outside-toplevel
+        from miniconf.freeze import iter_targets
+
+        load_site_data("sitedata", site_data, by_uid)
+        return [
+            target.url
+            for target in iter_targets(create_freezer())
+            if any(fnmatch.fnmatchcase(target.url, pattern) for pattern in patterns)
+        ]
+
+    adapter = app.url_map.bind("localhost")
+    for url in patterns:
+        try:
+            adapter.match(url)
+        except HTTPException:
+            sys.exit(f"No page at {url}")
+    load_site_data("sitedata", site_data, by_uid, lazy=True)
+    return patterns
+
+
+def freeze_inputs(endpoint: str, values: Dict[str, Any]) -> List[Any]:
+    """Returns the data the frozen page of `endpoint` is rendered from.
+
+    Pages are only rendered again by `--incremental` builds if this changed.
+    """
+    inputs = [site_data["config"]]
+    if endpoint == "paper":
+        paper: Paper = by_uid["papers"][values["uid"]]
+        inputs.append(paper)
+        # Unknown ids fail when rendering the page, not when hashing its inputs.
+        inputs.extend(
+            by_uid["papers"].get(uid) for uid in paper.content.similar_paper_uids[1:]
+        )
+    elif endpoint == "sponsor":
+        sponsor = by_uid["sponsors"][values["uid"]]
+        inputs.append(sponsor)
+        inputs.extend(
+            by_uid["papers"].get(uid) for uid in sponsor.get("publications") or ()
+        )
+    elif endpoint in {"plenary_session", "tutorial", "workshop"}:
+        inputs.append(by_uid[endpoint + "s"][values["uid"]])
+    elif endpoint == "papers_json":
+        inputs.append(site_data["papers"])
+    elif endpoint == "papers_program":
+        index = site_data["index"]
+        inputs.append(index.papers_by_program.get(values["program"], ()))
+    elif endpoint == "track_json":
+        index = site_data["index"]
+        key = (values["program_name"], values["track_name"])
+        inputs.append(index.papers_by_program_track.get(key, ()))
+    elif endpoint == "serve":
+        inputs.append(site_data[json_exports.dataset(f"serve_{values['path']}.json")])
+    else:
+        # The top level pages use all kinds of data
+        inputs.append(site_data)
+    return inputs
 
 
 def parse_arguments():
@@ -309,20 +505,268 @@ def parse_arguments():
         dest="build",
         help="Convert the site to static assets",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes used to convert the site to static assets",
+    )
+    parser.add_argument(
+        "--batch",
+        nargs="+",
+        metavar="SITEDATA:OUTPUT",
+        help="Convert several sites concurrently, e.g. sitedata:build demo:build_demo",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=False,
+        help="Only convert pages whose data or templates changed since the last build",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["jinja", "flask"],
+        default="jinja",
+        help="Render pages directly with Jinja or request them with Frozen-Flask",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        default=False,
+        help="Write gzip and brotli variants of the static assets",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        default=False,
+        help="Link scripts and stylesheets with content hashes in their file names",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=False,
+        help="Report the render times and sizes of the pages per endpoint",
+    )
+    parser.add_argument(
+        "--profile-slowest",
+        action="store_true",
+        default=False,
+        help="Also write the cProfile stats of the slowest endpoint",
+    )
+    parser.add_argument(
+        "--keep-going",
+        action="store_true",
+        default=False,
+        help="Convert all other pages if a page fails and list the failed pages",
+    )
+    parser.add_argument(
+        "--refreeze-failed",
+        action="store_true",
+        default=False,
+        help="Only convert the pages that failed in the last build",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        default=False,
+        help="Load the site data from the files instead of the last snapshot",
+    )
+    parser.add_argument(
+        "--prerender-markdown",
+        action="store_true",
+        default=False,
+        help="Render the markdown of the site data before converting the pages",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        default=False,
+        help="Serve the site from several processes that share the loaded site data",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of processes that serve requests with --serve",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        default=False,
+        help="Record the latency of the requests per endpoint at /_debug/metrics",
+    )
+    parser.add_argument(
+        "--profile-slower-than",
+        type=float,
+        metavar="MS",
+        help="With --metrics, write the cProfile stats of slower requests",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to serve on")
+    parser.add_argument("--port", type=int, default=5000, help="Port to serve on")
+    parser.add_argument(
+        "--render",
+        nargs="+",
+        metavar="URL",
+        help="Only render these pages, e.g. /paper_main.1004.html or '/paper_*.html'",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Write the rendered pages to this folder instead of to stdout",
+    )
 
     return parser.parse_args()
 
 
+def site_data_cache_dir(args: argparse.Namespace) -> Optional[str]:
+    """Where the snapshots of the loaded site data are kept, unless `--no-cache`."""
+    return None if args.no_cache else app.config["SITE_DATA_CACHE_DIR"]
+
+
+def reload_site_data_files(names: List[str]) -> None:
+    """Rebuilds the site data that depends on the changed sitedata files."""
+    start = time.time()
+    stages = reload_site_data("sitedata", site_data, by_uid, names)
+    response_cache.invalidate()
+    templating.clear_fragment_cache(app)
+    print(
+        f"Reloaded {', '.join(names)} with {len(stages)} stages "
+        f"in {time.time() - start:.2f}s"
+    )
+
+
+def build(args: argparse.Namespace, asset_map: Optional[Dict[str, str]] = None):
+    """Freezes the loaded site data with the build options of `args`."""
+    # pylint: disable=import-outside-toplevel
+    from miniconf.compress import compress_build
+    from miniconf.freeze import freeze
+
+    # Every URL is only requested once.
+    app.config["RESPONSE_CACHE"] = False
+    freezer = create_freezer()
+    freeze(
+        freezer,
+        freeze_inputs,
+        jobs=args.jobs,
+        incremental=args.incremental,
+        engine=args.engine,
+        fingerprint=args.fingerprint,
+        asset_map=asset_map,
+        profile=args.profile,
+        profile_slowest=args.profile_slowest,
+        keep_going=args.keep_going,
+        refreeze_failed=args.refreeze_failed,
+        aliases={
+            "/" + alias: "/" + name for alias, name in json_exports.aliases().items()
+        },
+    )
+    report_unexported_datasets()
+    if args.compress:
+        compress_build(freezer.root)
+
+
+def build_batch(specs: List[str], args: argparse.Namespace) -> None:
+    """Builds several sites, given as `SITEDATA:OUTPUT` pairs, concurrently.
+
+    The templates are compiled and the static assets are fingerprinted once,
+    before each site is loaded and frozen in its own forked process.
+    """
+    # pylint: disable=import-outside-toplevel
+    from miniconf.assets import fingerprint_assets
+    from miniconf.batch import build_sites, parse_sites
+    from miniconf.freeze import FreezeError
+
+    try:
+        sites = parse_sites(specs)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    templating.precompile_templates(app)
+    asset_map = fingerprint_assets(app.static_folder) if args.fingerprint else None
+
+    def build_site(sitedata: str, output: str) -> None:
+        print(f"Building {sitedata} into {output}")
+        load_site_data(
+            sitedata,
+            site_data,
+            by_uid,
+            markdown=markdown if args.prerender_markdown else None,
+            cache_dir=site_data_cache_dir(args),
+        )
+        app.config["FREEZER_DESTINATION"] = output
+        try:
+            build(args, asset_map)
+        except FreezeError as e:
+            sys.exit(f"{output}: {e}")
+
+    exit_codes = build_sites(sites, build_site)
+    if any(exit_codes.values()):
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     args = parse_arguments()
 
-    extra_files = load_site_data("sitedata", site_data, by_uid)
+    if args.render:
+        render(args.render, args.output)
+        sys.exit()
+
+    if args.batch:
+        build_batch(args.batch, args)
+        sys.exit()
+
+    # The dev server only builds the site data of the requested pages. Builds
+    # need all of it, and `--serve` loads it before forking its workers.
+    load_site_data(
+        "sitedata",
+        site_data,
+        by_uid,
+        markdown=markdown if args.prerender_markdown else None,
+        cache_dir=site_data_cache_dir(args),
+        lazy=not (args.build or args.serve or args.prerender_markdown),
+    )
+    response_cache.invalidate()
+
+    if args.metrics and not args.build:
+        # pylint: disable=import-outside-toplevel
+        from miniconf import metrics
+
+        slower_than = args.profile_slower_than
+        if slower_than is not None:
+            slower_than /= 1000
+        metrics.init_app(app, profile_slower_than=slower_than)
 
     if args.build:
-        freezer.freeze()
+        # pylint: disable=import-outside-toplevel
+        from miniconf.freeze import FreezeError
+
+        try:
+            build(args)
+        except FreezeError as e:
+            sys.exit(str(e))
+    elif args.serve:
+        # pylint: disable=import-outside-toplevel
+        from miniconf.serve import PreforkServer
+        from miniconf.watch import SiteDataWatcher
+
+        server = PreforkServer(app, args.host, args.port, args.workers)
+
+        def reload_and_restart(names: List[str]) -> None:
+            reload_site_data_files(names)
+            server.restart()
+
+        SiteDataWatcher("sitedata", reload_and_restart).start()
+        server.serve_forever()
     else:
         debug_val = False
         if os.getenv("FLASK_DEBUG") == "True":
             debug_val = True
 
-        app.run(port=5000, debug=debug_val, extra_files=extra_files)
+        # With the debugger, Werkzeug serves from a child process of this one.
+        if not debug_val or os.getenv("WERKZEUG_RUN_MAIN") == "true":
+            # pylint: disable=import-outside-toplevel
+            from miniconf.watch import SiteDataWatcher
+
+            SiteDataWatcher("sitedata", reload_site_data_files).start()
+        app.run(host=args.host, port=args.port, debug=debug_val)
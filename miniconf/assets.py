@@ -0,0 +1,76 @@
+import json
+import os
+import shutil
+from typing import Dict
+
+from flask import Flask, current_app
+
+from miniconf.hashing import digest_file
+
+# Only stylesheets and scripts are referenced by fixed names from the templates.
+FINGERPRINTED_DIRECTORIES = ["css", "js"]
+FINGERPRINTED_EXTENSIONS = {".css", ".js"}
+ASSET_MAP_FILENAME = ".asset_map.json"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def init_app(app: Flask) -> None:
+    """Registers the `static_url` helper for the templates.
+
+    Without fingerprinting, `static_url("js/papers.js")` is "static/js/papers.js".
+    """
+    app.config.setdefault("STATIC_ASSET_MAP", {})
+    app.jinja_env.globals["static_url"] = static_url
+
+
+def static_url(path: str) -> str:
+    asset_map = current_app.config["STATIC_ASSET_MAP"]
+    return "static/" + asset_map.get(path, path)
+
+
+def fingerprint_assets(static_folder: str) -> Dict[str, str]:
+    """Maps the paths of the scripts and stylesheets to fingerprinted paths.
+
+    E.g. "js/papers.js" becomes "js/papers.3f9a1c2b.js", where the fingerprint is
+    the start of the digest of the file contents.
+    """
+    asset_map = {}
+    for directory in FINGERPRINTED_DIRECTORIES:
+        for dirpath, _, filenames in os.walk(os.path.join(static_folder, directory)):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, static_folder).replace(os.sep, "/")
+                base, extension = os.path.splitext(name)
+                if extension not in FINGERPRINTED_EXTENSIONS:
+                    continue
+                asset_map[name] = f"{base}.{digest_file(path)[:8]}{extension}"
+    return asset_map
+
+
+def write_fingerprinted_assets(
+    static_folder: str, root: str, asset_map: Dict[str, str]
+) -> Dict[str, str]:
+    """Copies the assets to their fingerprinted paths under `root/static`.
+
+    Also writes the asset map to `root` and returns the written files with
+    their sources.
+    """
+    written = {}
+    for name, fingerprinted in asset_map.items():
+        filename = os.path.join(root, "static", *fingerprinted.split("/"))
+        if not os.path.isfile(filename):
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            shutil.copyfile(os.path.join(static_folder, name), filename)
+        written[filename] = name
+
+    with open(os.path.join(root, ASSET_MAP_FILENAME), "w") as f:
+        json.dump(asset_map, f, indent=1, sort_keys=True)
+    return written
+
+
+def load_asset_map(root: str) -> Dict[str, str]:
+    path = os.path.join(root, ASSET_MAP_FILENAME)
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,61 @@
+import multiprocessing
+import os
+import time
+from typing import Callable, Dict, List, Tuple
+
+# Builds the site from a sitedata folder into an output folder.
+BuildFunction = Callable[[str, str], None]
+
+
+def parse_sites(specs: List[str]) -> List[Tuple[str, str]]:
+    """Parses `SITEDATA:OUTPUT` pairs, e.g. "sitedata_demo:build_demo".
+
+    Raises a `ValueError` for malformed pairs and for outputs that are used twice.
+    """
+    sites = []
+    for spec in specs:
+        sitedata, sep, output = spec.rpartition(":")
+        if not sep or not sitedata or not output:
+            raise ValueError(f"Expected SITEDATA:OUTPUT, got {spec!r}")
+        if not os.path.isdir(sitedata):
+            raise ValueError(f"{sitedata} is not a folder")
+        sites.append((sitedata, os.path.abspath(output)))
+
+    outputs = [output for _, output in sites]
+    duplicates = {output for output in outputs if outputs.count(output) > 1}
+    if duplicates:
+        raise ValueError(f"Sites share the output {', '.join(sorted(duplicates))}")
+    return sites
+
+
+def build_sites(sites: List[Tuple[str, str]], build: BuildFunction) -> Dict[str, int]:
+    """Runs `build(sitedata, output)` for all sites concurrently.
+
+    Each site is built in a process forked from this one, so the sites share
+    everything that is already set up here, e.g. the imported modules and the
+    compiled templates, while the site data that each build loads stays in its
+    own process. The build processes may fork their own workers.
+
+    Returns the exit code of the build of each output, i.e. 0 if it succeeded.
+    """
+    context = multiprocessing.get_context("fork")
+    processes = {}
+    start = time.time()
+    for sitedata, output in sites:
+        process = context.Process(target=build, args=(sitedata, output), name=output)
+        process.start()
+        processes[output] = process
+
+    exit_codes = {}
+    for output, process in processes.items():
+        process.join()
+        exit_codes[output] = process.exitcode
+
+    failed = [output for output, code in exit_codes.items() if code != 0]
+    print(
+        f"Built {len(sites) - len(failed)} of {len(sites)} sites "
+        f"in {time.time() - start:.1f}s"
+    )
+    for output in failed:
+        print(f"  {output}: failed with exit code {exit_codes[output]}")
+    return exit_codes
@@ -0,0 +1,117 @@
+import gzip
+import json
+import mimetypes
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import brotli
+
+from miniconf.assets import IMMUTABLE_CACHE_CONTROL, load_asset_map
+
+COMPRESSED_EXTENSIONS = {".html", ".json", ".js", ".css"}
+# Below this size, the compressed variant doesn't save a network round trip.
+MIN_SIZE = 1024
+METADATA_FILENAME = ".object_metadata.json"
+
+# The files written by `compress_build`, which `freeze` must keep.
+OUTPUT_PATTERNS = ["*.gz", "*.br", METADATA_FILENAME]
+
+ENCODINGS = {".gz": "gzip", ".br": "br"}
+
+
+def compress_build(
+    root: str, min_size: int = MIN_SIZE, jobs: Optional[int] = None
+) -> Dict[str, Dict[str, str]]:
+    """Writes `.gz` and `.br` siblings of the text files of a build.
+
+    HTML, JSON, JavaScript and CSS files of at least `min_size` bytes are
+    compressed at the maximum level by `jobs` processes. Siblings that are newer
+    than their file are kept and siblings of removed files are deleted.
+
+    Writes `METADATA_FILENAME` to `root`, which maps the path of every object to
+    the `Content-Type`, `Content-Encoding` and `Cache-Control` headers it has
+    to be served with, and returns this mapping.
+    """
+    sources: List[str] = []
+    siblings: List[str] = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if os.path.splitext(filename)[1] in ENCODINGS:
+                siblings.append(path)
+            elif (
+                os.path.splitext(filename)[1] in COMPRESSED_EXTENSIONS
+                and os.path.getsize(path) >= min_size
+            ):
+                sources.append(path)
+
+    # Remove the variants of files that were removed or got too small.
+    source_set = set(sources)
+    for path in siblings:
+        if os.path.splitext(path)[0] not in source_set:
+            os.remove(path)
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        sizes = list(executor.map(_compress_file, sources, chunksize=16))
+
+    original = sum(size[0] for size in sizes)
+    print(
+        f"Compressed {len(sources)} files of {original / 2**20:.1f} MB: "
+        f"gzip {sum(size[1] for size in sizes) / 2**20:.1f} MB, "
+        f"brotli {sum(size[2] for size in sizes) / 2**20:.1f} MB"
+    )
+
+    metadata = build_metadata(root)
+    with open(os.path.join(root, METADATA_FILENAME), "w") as f:
+        json.dump(metadata, f, indent=1, sort_keys=True)
+    return metadata
+
+
+def build_metadata(root: str) -> Dict[str, Dict[str, str]]:
+    # Fingerprinted assets never change, so they can be cached forever.
+    immutable = {"static/" + path for path in load_asset_map(root).values()}
+
+    metadata = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.startswith("."):
+                continue
+            path = os.path.relpath(os.path.join(dirpath, filename), root)
+            key = path.replace(os.sep, "/")
+            base, extension = os.path.splitext(key)
+            headers = {}
+            if extension in ENCODINGS:
+                headers["Content-Encoding"] = ENCODINGS[extension]
+                content_type, _ = mimetypes.guess_type(base)
+            else:
+                content_type, _ = mimetypes.guess_type(key)
+            headers["Content-Type"] = content_type or "application/octet-stream"
+            if (base if extension in ENCODINGS else key) in immutable:
+                headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+            metadata[key] = headers
+    return metadata
+
+
+def _compress_file(path: str) -> Tuple[int, int, int]:
+    with open(path, "rb") as f:
+        content = f.read()
+    mtime = os.path.getmtime(path)
+
+    gz_path = path + ".gz"
+    if not _is_fresh(gz_path, mtime):
+        with open(gz_path, "wb") as f:
+            # No name and no timestamp in the header to get reproducible files
+            with gzip.GzipFile("", "wb", compresslevel=9, fileobj=f, mtime=0) as gz:
+                gz.write(content)
+
+    br_path = path + ".br"
+    if not _is_fresh(br_path, mtime):
+        with open(br_path, "wb") as f:
+            f.write(brotli.compress(content, quality=11))
+
+    return len(content), os.path.getsize(gz_path), os.path.getsize(br_path)
+
+
+def _is_fresh(path: str, source_mtime: float) -> bool:
+    return os.path.isfile(path) and os.path.getmtime(path) >= source_mtime
@@ -0,0 +1,584 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from miniconf.compress import build_metadata
+from miniconf.hashing import digest_file
+
+MANIFEST_KEY = ".deploy_manifest.json"
+MANIFEST_VERSION = 1
+
+# Versioned deploys upload every build to `versions/<version>/` and keep the
+# version that is served in `CURRENT_VERSION_KEY`.
+VERSIONS_PREFIX = "versions/"
+CURRENT_VERSION_KEY = ".current_version"
+KEEP_VERSIONS = 5
+
+# CloudFront charges per invalidated path, a wildcard counts as one path.
+MAX_INVALIDATION_PATHS = 500
+
+# The headers of `compress.build_metadata` as arguments of boto3 uploads.
+S3_HEADER_ARGS = {
+    "Content-Type": "ContentType",
+    "Content-Encoding": "ContentEncoding",
+    "Cache-Control": "CacheControl",
+}
+
+
+class Storage(ABC):
+    """Where a build is deployed to, e.g. an S3 bucket behind CloudFront."""
+
+    @abstractmethod
+    def read(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def write(self, key: str, content: bytes, headers: Dict[str, str]) -> None:
+        pass
+
+    @abstractmethod
+    def upload(self, key: str, filename: str, headers: Dict[str, str]) -> None:
+        pass
+
+    @abstractmethod
+    def copy(self, source_key: str, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, keys: List[str]) -> None:
+        pass
+
+    @abstractmethod
+    def list_keys(self, prefix: str = "") -> Iterator[str]:
+        pass
+
+    def switch(self, prefix: str) -> None:
+        """Serves the objects under `prefix` as the site, if the storage can."""
+
+    def invalidate(self, paths: List[str]) -> None:
+        """Removes the paths from the caches in front of the storage, if any."""
+
+
+class LocalStorage(Storage):
+    """Deploys to a directory, e.g. to try a deploy or to serve it locally."""
+
+    def __init__(self, directory: str):
+        self.directory = os.path.normpath(directory)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, *key.split("/"))
+
+    def read(self, key: str) -> Optional[bytes]:
+        if not os.path.isfile(self._path(key)):
+            return None
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def write(self, key: str, content: bytes, headers: Dict[str, str]) -> None:
+        os.makedirs(os.path.dirname(self._path(key)), exist_ok=True)
+        with open(self._path(key), "wb") as f:
+            f.write(content)
+
+    def upload(self, key: str, filename: str, headers: Dict[str, str]) -> None:
+        with open(filename, "rb") as f:
+            self.write(key, f.read(), headers)
+
+    def copy(self, source_key: str, key: str) -> None:
+        os.makedirs(os.path.dirname(self._path(key)), exist_ok=True)
+        shutil.copyfile(self._path(source_key), self._path(key))
+
+    def delete(self, keys: List[str]) -> None:
+        for key in keys:
+            if not os.path.isfile(self._path(key)):
+                continue
+            os.remove(self._path(key))
+            parent = os.path.dirname(self._path(key))
+            while parent != self.directory and not os.listdir(parent):
+                os.rmdir(parent)
+                parent = os.path.dirname(parent)
+
+    def list_keys(self, prefix: str = "") -> Iterator[str]:
+        for dirpath, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                path = os.path.relpath(os.path.join(dirpath, filename), self.directory)
+                key = path.replace(os.sep, "/")
+                if key.startswith(prefix):
+                    yield key
+
+    def switch(self, prefix: str) -> None:
+        """Points the `current` symlink to `prefix`, e.g. for a local server."""
+        link = os.path.join(self.directory, "current")
+        # Replacing a symlink with another one is atomic.
+        os.symlink(prefix.rstrip("/"), link + ".new")
+        os.replace(link + ".new", link)
+
+
+class S3Storage(Storage):
+    """Deploys to `s3://bucket/prefix` and invalidates paths in CloudFront."""
+
+    def __init__(
+        self, bucket: str, prefix: str = "", distribution_id: Optional[str] = None
+    ):
+        # Only needed for deploys, so boto3 is imported lazily.
+        import boto3  # pylint: disable=import-outside-toplevel
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.distribution_id = distribution_id
+        self.s3 = boto3.client("s3")
+        self.cloudfront = boto3.client("cloudfront") if distribution_id else None
+
+    def read(self, key: str) -> Optional[bytes]:
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=self.prefix + key)
+        except self.s3.exceptions.NoSuchKey:
+            return None
+        return response["Body"].read()
+
+    def write(self, key: str, content: bytes, headers: Dict[str, str]) -> None:
+        self.s3.put_object(
+            Bucket=self.bucket, Key=self.prefix + key, Body=content, **_s3_args(headers)
+        )
+
+    def upload(self, key: str, filename: str, headers: Dict[str, str]) -> None:
+        self.s3.upload_file(
+            filename, self.bucket, self.prefix + key, ExtraArgs=_s3_args(headers)
+        )
+
+    def copy(self, source_key: str, key: str) -> None:
+        # Copies within the bucket keep the headers and don't go through us.
+        self.s3.copy_object(
+            Bucket=self.bucket,
+            Key=self.prefix + key,
+            CopySource={"Bucket": self.bucket, "Key": self.prefix + source_key},
+        )
+
+    def delete(self, keys: List[str]) -> None:
+        # At most 1000 keys can be deleted per request.
+        for i in range(0, len(keys), 1000):
+            objects = [{"Key": self.prefix + key} for key in keys[i : i + 1000]]
+            self.s3.delete_objects(
+                Bucket=self.bucket, Delete={"Objects": objects, "Quiet": True}
+            )
+
+    def list_keys(self, prefix: str = "") -> Iterator[str]:
+        paginator = self.s3.get_paginator("list_objects_v2")
+        pages = paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + prefix)
+        for page in pages:
+            for obj in page.get("Contents", []):
+                yield obj["Key"][len(self.prefix) :]
+
+    def switch(self, prefix: str) -> None:
+        """Sets the origin path of the distribution for the bucket to `prefix`.
+
+        Waits until the distribution is deployed, so that invalidations that
+        follow don't cache the objects of the previous origin path again. Raises
+        a ValueError if no origin of the distribution is the bucket.
+        """
+        if not self.cloudfront:
+            print("WARNING: no CloudFront distribution to switch the version of")
+            return
+        response = self.cloudfront.get_distribution_config(Id=self.distribution_id)
+        config = response["DistributionConfig"]
+        origins = [
+            origin
+            for origin in config["Origins"]["Items"]
+            if origin["DomainName"].startswith(self.bucket + ".s3")
+        ]
+        # Otherwise the distribution would keep serving the previous version.
+        if not origins:
+            raise ValueError(
+                f"No origin of the distribution {self.distribution_id} "
+                f"serves the bucket {self.bucket}"
+            )
+        for origin in origins:
+            origin["OriginPath"] = "/" + (self.prefix + prefix).strip("/")
+        self.cloudfront.update_distribution(
+            Id=self.distribution_id, IfMatch=response["ETag"], DistributionConfig=config
+        )
+        waiter = self.cloudfront.get_waiter("distribution_deployed")
+        waiter.wait(Id=self.distribution_id)
+
+    def invalidate(self, paths: List[str]) -> None:
+        if not self.cloudfront or not paths:
+            return
+        self.cloudfront.create_invalidation(
+            DistributionId=self.distribution_id,
+            InvalidationBatch={
+                "Paths": {"Quantity": len(paths), "Items": paths},
+                "CallerReference": str(time.time()),
+            },
+        )
+
+
+def _s3_args(headers: Dict[str, str]) -> Dict[str, str]:
+    return {S3_HEADER_ARGS[name]: value for name, value in headers.items()}
+
+
+def open_storage(url: str, distribution_id: Optional[str] = None) -> Storage:
+    """The storage of `s3://bucket/prefix` URLs or of a local directory."""
+    parts = urlsplit(url)
+    if parts.scheme == "s3":
+        return S3Storage(parts.netloc, parts.path, distribution_id)
+    return LocalStorage(url)
+
+
+def build_manifest(root: str) -> Dict[str, Dict[str, Any]]:
+    """Maps the key of every object of the build to its hash and headers.
+
+    Dotfiles like the freeze manifest describe the build and are not deployed.
+    """
+    return {
+        key: {
+            "sha256": digest_file(os.path.join(root, *key.split("/"))),
+            "headers": headers,
+        }
+        for key, headers in build_metadata(root).items()
+    }
+
+
+def load_remote_manifest(
+    storage: Storage, prefix: str = ""
+) -> Optional[Dict[str, Dict[str, Any]]]:
+    content = storage.read(prefix + MANIFEST_KEY)
+    if content is None:
+        return None
+    manifest = json.loads(content)
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest["objects"]
+
+
+def diff_manifests(
+    local: Dict[str, Dict[str, Any]], remote: Dict[str, Dict[str, Any]]
+) -> Tuple[List[str], List[str], List[str]]:
+    """The keys that are new, changed (in content or headers) and removed."""
+    new = sorted(key for key in local if key not in remote)
+    changed = sorted(
+        key for key in local if key in remote and local[key] != remote[key]
+    )
+    removed = sorted(key for key in remote if key not in local)
+    return new, changed, removed
+
+
+def invalidation_paths(keys: List[str]) -> List[str]:
+    paths = ["/" + quote(key) for key in keys]
+    if "index.html" in keys:
+        paths.append("/")
+    if len(paths) > MAX_INVALIDATION_PATHS:
+        return ["/*"]
+    return paths
+
+
+def deploy(
+    root: str, storage: Storage, jobs: int = 16, dry_run: bool = False
+) -> Dict[str, List[str]]:
+    """Uploads the objects of the build that differ from the last deploy.
+
+    The manifest of the last deploy is stored next to the objects. Only new and
+    changed objects are uploaded, by `jobs` threads, and pages are uploaded after
+    all other objects, so that they never link to assets that are missing.
+    Then the manifest is replaced, removed objects are deleted and the caches of
+    changed and removed objects are invalidated. Without a remote manifest, e.g.
+    on the first deploy, all objects of the storage that are not part of the
+    build are deleted and all caches are invalidated.
+    """
+    start = time.time()
+    local = build_manifest(root)
+    remote = load_remote_manifest(storage)
+    if remote is None:
+        existing = set(storage.list_keys()) - {MANIFEST_KEY}
+        new, changed, removed = diff_manifests(local, {})
+        removed = sorted(existing - set(local))
+        paths = ["/*"]
+    else:
+        new, changed, removed = diff_manifests(local, remote)
+        paths = invalidation_paths(changed + removed)
+
+    upload_bytes = sum(
+        os.path.getsize(os.path.join(root, *key.split("/"))) for key in new + changed
+    )
+    print(
+        f"Deploying {len(local)} objects: {len(new)} new, {len(changed)} changed "
+        f"({upload_bytes / 2**20:.1f} MB), {len(removed)} removed, "
+        f"{len(local) - len(new) - len(changed)} unchanged"
+    )
+    plan = {"new": new, "changed": changed, "removed": removed, "invalidated": paths}
+    if dry_run:
+        return plan
+
+    _upload(root, storage, local, new + changed, jobs=jobs)
+    _write_manifest(storage, local)
+    storage.delete(removed)
+    if new or changed or removed:
+        storage.invalidate(paths)
+    else:
+        plan["invalidated"] = []
+
+    print(f"Deployed in {time.time() - start:.1f}s")
+    return plan
+
+
+def _upload(
+    root: str,
+    storage: Storage,
+    local: Dict[str, Dict[str, Any]],
+    keys: List[str],
+    jobs: int,
+    prefix: str = "",
+    copies: Optional[Dict[str, str]] = None,
+) -> None:
+    """Uploads `keys` of the build and copies objects to `prefix`.
+
+    `copies` maps keys of the build to keys of the storage with the same
+    content. Pages are written after all other objects.
+    """
+    copies = copies or {}
+
+    def write(key: str) -> None:
+        if key in copies:
+            storage.copy(copies[key], prefix + key)
+        else:
+            filename = os.path.join(root, *key.split("/"))
+            storage.upload(prefix + key, filename, local[key]["headers"])
+
+    keys = list(keys) + list(copies)
+    pages = [key for key in keys if key.endswith(".html")]
+    assets = [key for key in keys if not key.endswith(".html")]
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for batch in (assets, pages):
+            # `list` waits for the uploads and raises their errors.
+            list(executor.map(write, batch))
+
+
+def _write_manifest(
+    storage: Storage, local: Dict[str, Dict[str, Any]], prefix: str = ""
+) -> None:
+    manifest = {"version": MANIFEST_VERSION, "objects": local}
+    storage.write(
+        prefix + MANIFEST_KEY,
+        json.dumps(manifest, indent=1, sort_keys=True).encode(),
+        {"Content-Type": "application/json", "Cache-Control": "no-store"},
+    )
+
+
+def version_id(root: str) -> str:
+    """The version of a build from its `version.json`, e.g. "20201116-093000-1a2b3c4d".
+
+    The ids sort by the date of the build.
+    """
+    path = os.path.join(root, "version.json")
+    if os.path.isfile(path):
+        with open(path) as f:
+            version = json.load(f)
+    else:
+        # pylint: disable=import-outside-toplevel
+        from generate_version import get_version_info
+
+        version = json.loads(get_version_info())
+    date = version["date"].replace("-", "").replace(":", "").replace(" ", "-")
+    return f"{date}-{version['sha'][:8]}"
+
+
+def list_versions(storage: Storage) -> List[str]:
+    """The versions that were uploaded completely, from the oldest to the newest."""
+    versions = []
+    for key in storage.list_keys(VERSIONS_PREFIX):
+        version, _, name = key[len(VERSIONS_PREFIX) :].partition("/")
+        if name == MANIFEST_KEY:
+            versions.append(version)
+    return sorted(versions)
+
+
+def current_version(storage: Storage) -> Optional[str]:
+    content = storage.read(CURRENT_VERSION_KEY)
+    return content.decode().strip() if content else None
+
+
+def deploy_version(
+    root: str,
+    storage: Storage,
+    keep: int = KEEP_VERSIONS,
+    jobs: int = 16,
+    dry_run: bool = False,
+) -> Dict[str, List[str]]:
+    """Uploads the build as a new version and then switches the site to it.
+
+    Objects that didn't change since the current version are copied within the
+    storage, only new and changed objects are uploaded. Nothing that is served
+    changes until the upload is complete, then `Storage.switch` serves the new
+    version at once and the caches of the changed and removed objects are
+    invalidated. Only the `keep` newest versions and the current one are kept.
+    """
+    start = time.time()
+    version = version_id(root)
+    prefix = VERSIONS_PREFIX + version + "/"
+    local = build_manifest(root)
+    live = current_version(storage)
+    if version == live:
+        raise ValueError(f"Version {version} is already deployed")
+    live_manifest = (
+        load_remote_manifest(storage, VERSIONS_PREFIX + live + "/") if live else None
+    )
+    if live_manifest is None:
+        new, changed, removed = diff_manifests(local, {})
+        paths = ["/*"]
+    else:
+        new, changed, removed = diff_manifests(local, live_manifest)
+        paths = invalidation_paths(changed + removed)
+    copies = {
+        key: VERSIONS_PREFIX + live + "/" + key
+        for key in local
+        if live_manifest and live_manifest.get(key) == local[key]
+    }
+
+    print(
+        f"Deploying version {version} of {len(local)} objects: {len(new)} new, "
+        f"{len(changed)} changed, {len(removed)} removed, "
+        f"{len(copies)} copied from {live}"
+    )
+    plan = {"new": new, "changed": changed, "removed": removed, "invalidated": paths}
+    if dry_run:
+        return plan
+
+    _upload(
+        root, storage, local, new + changed, jobs=jobs, prefix=prefix, copies=copies
+    )
+    _write_manifest(storage, local, prefix)
+    _activate(storage, version, paths)
+    prune_versions(storage, keep)
+
+    print(f"Deployed version {version} in {time.time() - start:.1f}s")
+    return plan
+
+
+def rollback(storage: Storage, version: Optional[str] = None) -> str:
+    """Serves `version` again, by default the one before the current version."""
+    versions = list_versions(storage)
+    live = current_version(storage)
+    if version is None:
+        older = [v for v in versions if live is None or v < live]
+        if not older:
+            raise ValueError(f"There is no version before {live}")
+        version = older[-1]
+    elif version not in versions:
+        raise ValueError(f"Unknown version {version}, we have {', '.join(versions)}")
+
+    manifest = load_remote_manifest(storage, VERSIONS_PREFIX + version + "/")
+    live_manifest = (
+        load_remote_manifest(storage, VERSIONS_PREFIX + live + "/") if live else None
+    )
+    if live_manifest is None:
+        paths = ["/*"]
+    else:
+        new, changed, removed = diff_manifests(manifest, live_manifest)
+        paths = invalidation_paths(new + changed + removed)
+    _activate(storage, version, paths)
+    print(f"Rolled back from {live} to {version}")
+    return version
+
+
+def prune_versions(storage: Storage, keep: int = KEEP_VERSIONS) -> List[str]:
+    """Deletes all but the `keep` newest versions and the current one.
+
+    Incomplete uploads of older versions are deleted as well.
+    """
+    live = current_version(storage)
+    kept = set(list_versions(storage)[-keep:]) | {live}
+    keys: Dict[str, List[str]] = {}
+    for key in storage.list_keys(VERSIONS_PREFIX):
+        version = key[len(VERSIONS_PREFIX) :].partition("/")[0]
+        if version not in kept and (live is None or version < live):
+            keys.setdefault(version, []).append(key)
+    for version_keys in keys.values():
+        storage.delete(version_keys)
+    if keys:
+        print(f"Deleted versions {', '.join(sorted(keys))}")
+    return sorted(keys)
+
+
+def _activate(storage: Storage, version: str, paths: List[str]) -> None:
+    storage.switch(VERSIONS_PREFIX + version)
+    storage.write(
+        CURRENT_VERSION_KEY,
+        version.encode(),
+        {"Content-Type": "text/plain", "Cache-Control": "no-store"},
+    )
+    storage.invalidate(paths)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Deploys a frozen site")
+    parser.add_argument(
+        "destination", help="An S3 URL like s3://bucket/prefix or a local directory"
+    )
+    parser.add_argument("--root", default="build", help="The build directory")
+    parser.add_argument(
+        "--distribution-id", help="The CloudFront distribution to invalidate"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=16, help="Number of concurrent uploads"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        default=False,
+        help="Only print what would be uploaded and deleted",
+    )
+    parser.add_argument(
+        "--in-place",
+        action="store_true",
+        default=False,
+        help="Replace the objects of the site instead of uploading a new version",
+    )
+    parser.add_argument(
+        "--keep",
+        type=int,
+        default=KEEP_VERSIONS,
+        help="Number of versions that are kept for rollbacks",
+    )
+    parser.add_argument(
+        "--rollback",
+        nargs="?",
+        const="",
+        metavar="VERSION",
+        help="Serve an older version again, by default the one before the current",
+    )
+    parser.add_argument(
+        "--list",
+        action="store_true",
+        default=False,
+        help="List the versions that can be rolled back to",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    storage = open_storage(args.destination, args.distribution_id)
+    try:
+        if args.list:
+            live_version = current_version(storage)
+            for v in list_versions(storage):
+                print(v + (" (current)" if v == live_version else ""))
+        elif args.rollback is not None:
+            rollback(storage, args.rollback or None)
+        elif args.in_place:
+            deploy(args.root, storage, jobs=args.jobs, dry_run=args.dry_run)
+        else:
+            deploy_version(
+                args.root, storage, keep=args.keep, jobs=args.jobs, dry_run=args.dry_run
+            )
+    except ValueError as e:
+        sys.exit(str(e))
+
+
+if __name__ == "__main__":
+    main()
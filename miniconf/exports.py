@@ -0,0 +1,40 @@
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class ExportRegistry:
+    """The site data that is published as JSON files, by their public names.
+
+    Each dataset declares the names it is served under. Only the first name is
+    serialized, all other names are aliases that get a copy of the same bytes.
+    Datasets that are not registered are not published at all.
+    """
+
+    def __init__(self):
+        self._names: Dict[str, List[str]] = OrderedDict()
+        self._datasets: Dict[str, str] = {}
+
+    def register(self, dataset: str, name: str, *aliases: str) -> None:
+        assert dataset not in self._names, dataset
+        for export_name in (name,) + aliases:
+            assert export_name not in self._datasets, export_name
+            self._datasets[export_name] = dataset
+        self._names[dataset] = [name, *aliases]
+
+    def __contains__(self, dataset: str) -> bool:
+        return dataset in self._names
+
+    def dataset(self, name: str) -> Optional[str]:
+        """The dataset published as `name`, if any."""
+        return self._datasets.get(name)
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        """Yields the dataset and the serialized name of every export."""
+        for dataset, names in self._names.items():
+            yield dataset, names[0]
+
+    def aliases(self) -> Dict[str, str]:
+        """Maps every alias to the name that is serialized."""
+        return {
+            alias: names[0] for names in self._names.values() for alias in names[1:]
+        }
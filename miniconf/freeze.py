@@ -0,0 +1,469 @@
+import cProfile
+import functools
+import glob
+import inspect
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+import traceback
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+from unicodedata import normalize
+from urllib.parse import unquote, urlsplit
+
+from flask import url_for
+from flask_frozen import Freezer, walk_directory
+from werkzeug.exceptions import HTTPException
+
+from miniconf.assets import (
+    ASSET_MAP_FILENAME,
+    fingerprint_assets,
+    write_fingerprinted_assets,
+)
+from miniconf.compress import OUTPUT_PATTERNS
+from miniconf.hashing import (
+    digest_bytes,
+    digest_data,
+    digest_directory,
+    digest_file,
+    digest_files,
+)
+from miniconf.profiling import write_report
+from miniconf.render import can_render, render_page
+from miniconf.templating import clear_fragment_cache
+from miniconf.timing import record_stages
+
+MANIFEST_FILENAME = ".freeze_manifest.json"
+MANIFEST_VERSION = 1
+FAILURES_FILENAME = ".freeze_failures.json"
+SOURCE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# Returns the objects that the page of an endpoint is rendered from.
+InputsFunction = Callable[[str, Dict[str, Any]], List[Any]]
+
+# The freezer of each worker, set by `_init_worker`. Workers are forked after
+# the site data has been loaded, so they inherit it together with the app and
+# the loaded data.
+_worker: Dict[str, Any] = {}
+
+
+class FreezeError(Exception):
+    """Raised after a freeze that continued on errors when some URLs failed."""
+
+    def __init__(self, failures: List[Dict[str, Any]]):
+        super().__init__(f"Failed to freeze {len(failures)} URLs")
+        self.failures = failures
+
+
+class FreezeTarget(NamedTuple):
+    url: str
+    endpoint: Optional[str]
+    values: Dict[str, Any]
+
+
+def iter_targets(freezer: Freezer) -> Iterator[FreezeTarget]:
+    """Runs all URL generators of the freezer and yields every URL once.
+
+    This mirrors the URL generation of Frozen-Flask, but keeps the endpoint and
+    its values so that we know which data a URL is rendered from.
+    """
+    seen_urls: Set[str] = set()
+    adapter = freezer.app.url_map.bind("localhost")
+    with freezer.app.test_request_context():
+        for generator in freezer.url_generators:
+            for generated in generator():
+                if isinstance(generated, str):
+                    url = generated
+                    try:
+                        endpoint, values = adapter.match(url)
+                    except HTTPException:
+                        endpoint, values = None, {}
+                elif isinstance(generated, Mapping):
+                    endpoint, values = generator.__name__, dict(generated)
+                    url = url_for(endpoint, **values)
+                else:
+                    endpoint, values = generated[0], generated[1]
+                    url = url_for(endpoint, **values)
+                # `url_for` quotes URLs, e.g. a space becomes %20
+                url = urlsplit(unquote(url)).path
+                if url in seen_urls:
+                    continue
+                seen_urls.add(url)
+                yield FreezeTarget(url, endpoint, values)
+
+
+def freeze(
+    freezer: Freezer,
+    inputs: InputsFunction,
+    jobs: int = 1,
+    incremental: bool = False,
+    engine: str = "jinja",
+    fingerprint: bool = False,
+    asset_map: Optional[Dict[str, str]] = None,
+    aliases: Optional[Dict[str, str]] = None,
+    profile: bool = False,
+    profile_slowest: bool = False,
+    keep_going: bool = False,
+    refreeze_failed: bool = False,
+) -> Set[str]:
+    """Freezes the app into `FREEZER_DESTINATION` using `jobs` processes.
+
+    The URLs of all registered generators are split into `jobs` disjoint slices
+    which are rendered by forked worker processes.
+
+    With the "jinja" `engine`, pages of views decorated with `templated` are
+    rendered directly with the Jinja environment of the app and static files are
+    copied, see `render_page`. All other URLs and all URLs of the "flask" engine
+    are written by Frozen-Flask, which requests them with the Flask test client.
+    Both engines write byte-identical files.
+
+    If `fingerprint` is set, scripts and stylesheets are also copied to paths
+    with a content hash, which the templates link to through `static_url`. The
+    `asset_map` of `fingerprint_assets` can be passed if it was already computed,
+    e.g. once for several sites with the same static folder.
+
+    `aliases` maps URLs to other URLs with the same content. They are not
+    rendered, but get a copy of the file of the other URL.
+
+    With `profile`, the render times, the bytes written and the time spent in
+    templates and in the serialization of JSON are reported per endpoint, see
+    `profiling.write_report`. With `profile_slowest`, the URLs of the slowest
+    endpoint are rendered once more with cProfile and the stats are written to
+    `.freeze_profile_<endpoint>.pstats`, e.g. for `snakeviz` or `flameprof`.
+
+    Afterwards, a manifest with the hashes of the inputs and of the output of
+    every URL is written to the destination. The inputs are the templates, the
+    code of the app and of `miniconf` and the objects returned by
+    `inputs(endpoint, values)`, e.g. the config and the `by_uid` record of the
+    page. Static files are hashed directly. If
+    `incremental` is set, only URLs whose inputs changed since the last freeze
+    are rendered again and all other files are left untouched.
+
+    With `keep_going`, an exception while rendering a URL doesn't abort the
+    freeze. The file of the URL is removed, all other URLs are frozen and the
+    failed URLs are written with their exceptions to `FAILURES_FILENAME`, before
+    a `FreezeError` is raised. Failed URLs are left out of the manifest, so that
+    the next incremental freeze renders them again. With `refreeze_failed`, only
+    the URLs in the failures file of the last freeze are rendered, e.g. after
+    the data was fixed, and all other files are left untouched.
+
+    NOTE: URLs that are only discovered through `url_for` calls while rendering
+    are not followed. Our templates link with plain paths.
+    """
+    start = time.time()
+    root = freezer.root
+    os.makedirs(root, exist_ok=True)
+    app = freezer.app
+
+    # Refreezing the failed URLs doesn't see the other files as built.
+    remove_extra = app.config["FREEZER_REMOVE_EXTRA_FILES"] and not refreeze_failed
+    previous_files: Set[str] = set()
+    if remove_extra:
+        ignore = app.config["FREEZER_DESTINATION_IGNORE"] + [
+            MANIFEST_FILENAME,
+            FAILURES_FILENAME,
+        ]
+        # Compressed variants are updated by `compress_build` after freezing.
+        ignore += OUTPUT_PATTERNS
+        previous_files = {
+            normalize("NFC", os.path.join(root, *name.split("/")))
+            for name in walk_directory(root, ignore=ignore)
+        }
+
+    if not fingerprint:
+        asset_map = {}
+    elif asset_map is None:
+        asset_map = fingerprint_assets(app.static_folder)
+    app.config["STATIC_ASSET_MAP"] = asset_map
+    # Cached fragments may link to the assets.
+    clear_fragment_cache(app)
+
+    targets = list(iter_targets(freezer))
+    input_hashes = _hash_inputs(freezer, targets, inputs)
+
+    if refreeze_failed:
+        previous = load_manifest(root)
+        failed_urls = {failure["url"] for failure in load_failures(root)}
+        stale = [target for target in targets if target.url in failed_urls]
+    else:
+        previous = load_manifest(root) if incremental else {}
+        stale = [
+            target
+            for target in targets
+            if target.url not in previous
+            or previous[target.url]["inputs"] != input_hashes[target.url]
+            or not os.path.isfile(_filename(freezer, target.url))
+        ]
+
+    records, failures = _build_targets(freezer, stale, jobs, engine, keep_going)
+    failed = {failure["url"] for failure in failures}
+
+    # The files of failed URLs are already removed.
+    built_files = {normalize("NFC", _filename(freezer, t.url)) for t in targets}
+    aliased_bytes = 0
+    stale_urls = {target.url for target in stale}
+    for alias, url in (aliases or {}).items():
+        filename = _filename(freezer, alias)
+        built_files.add(normalize("NFC", filename))
+        if url in failed:
+            if os.path.isfile(filename):
+                os.remove(filename)
+            continue
+        if url in stale_urls or not os.path.isfile(filename):
+            shutil.copyfile(_filename(freezer, url), filename)
+        aliased_bytes += os.path.getsize(filename)
+    if fingerprint:
+        assets = write_fingerprinted_assets(
+            app.static_folder, root, app.config["STATIC_ASSET_MAP"]
+        )
+        built_files.update(normalize("NFC", filename) for filename in assets)
+        built_files.add(os.path.join(root, ASSET_MAP_FILENAME))
+    if remove_extra:
+        # Remove files from the previous build that are not here anymore.
+        for extra_file in previous_files - built_files:
+            os.remove(extra_file)
+            parent = os.path.dirname(extra_file)
+            if not os.listdir(parent):
+                os.removedirs(parent)
+
+    manifest = {}
+    for target in targets:
+        if target.url in failed:
+            continue
+        if target.url in stale_urls:
+            output = digest_file(_filename(freezer, target.url))
+            manifest[target.url] = {
+                "inputs": input_hashes[target.url],
+                "output": output,
+            }
+        elif target.url in previous:
+            manifest[target.url] = previous[target.url]
+    write_manifest(root, manifest)
+    write_failures(root, failures)
+
+    elapsed = time.time() - start
+    print(
+        f"Froze {len(stale) - len(failed)} of {len(targets)} URLs with {jobs} "
+        f"worker(s) in {elapsed:.1f}s"
+    )
+    if aliases:
+        print(
+            f"Copied {len(aliases)} aliases of {aliased_bytes / 2**20:.1f} MB "
+            "instead of rendering them"
+        )
+
+    if profile or profile_slowest:
+        report = write_report(records, root)
+        markdown = freezer.app.jinja_env.filters.get("markdown")
+        if jobs == 1 and hasattr(markdown, "stats"):
+            stats = markdown.stats()
+            print(
+                f"Markdown cache: {stats['hits']} hits, {stats['misses']} misses, "
+                f"{stats['evictions']} evictions"
+            )
+        if profile_slowest and report:
+            slowest = max(report, key=lambda e: report[e]["seconds"]["total"])
+            frozen = [target for target in stale if target.url not in failed]
+            _profile_endpoint(freezer, frozen, engine, slowest)
+
+    if failures:
+        print(f"Failed to freeze {len(failures)} URLs:")
+        for failure in failures:
+            print(f"  {failure['url']}: {failure['error']}")
+        print(f"See {os.path.join(root, FAILURES_FILENAME)} for the tracebacks")
+        raise FreezeError(failures)
+
+    return {target.url for target in targets}
+
+
+def load_manifest(root: str) -> Dict[str, Dict[str, str]]:
+    path = os.path.join(root, MANIFEST_FILENAME)
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest["urls"]
+
+
+def write_manifest(root: str, urls: Dict[str, Dict[str, str]]) -> None:
+    with open(os.path.join(root, MANIFEST_FILENAME), "w") as f:
+        json.dump({"version": MANIFEST_VERSION, "urls": urls}, f, indent=1)
+
+
+def load_failures(root: str) -> List[Dict[str, Any]]:
+    path = os.path.join(root, FAILURES_FILENAME)
+    if not os.path.isfile(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_failures(root: str, failures: List[Dict[str, Any]]) -> None:
+    path = os.path.join(root, FAILURES_FILENAME)
+    if not failures:
+        if os.path.isfile(path):
+            os.remove(path)
+        return
+    with open(path, "w") as f:
+        json.dump(sorted(failures, key=lambda f: f["url"]), f, indent=1)
+
+
+def _filename(freezer: Freezer, url: str) -> str:
+    return os.path.join(freezer.root, *freezer.urlpath_to_filepath(url).split("/"))
+
+
+def _hash_inputs(
+    freezer: Freezer, targets: List[FreezeTarget], inputs: InputsFunction
+) -> Dict[str, str]:
+    app = freezer.app
+    # The views of the app and the helpers in `miniconf` render the pages, too.
+    sources = glob.glob(os.path.join(SOURCE_DIRECTORY, "*.py"))
+    sources.append(inspect.getfile(sys.modules[app.import_name]))
+    shared = digest_directory(os.path.join(app.root_path, app.template_folder))
+    shared += digest_data(app.config["STATIC_ASSET_MAP"])
+    shared += digest_files(sources)
+
+    # Many pages share their inputs, e.g. the config, so we hash each object once.
+    # The objects are kept, so that the ids of temporary ones aren't reused.
+    digests: Dict[int, Tuple[Any, str]] = {}
+
+    def digest(obj: Any) -> str:
+        if id(obj) not in digests:
+            digests[id(obj)] = (obj, digest_data(obj))
+        return digests[id(obj)][1]
+
+    hashes = {}
+    for target in targets:
+        if target.endpoint == "static":
+            filename = os.path.join(app.static_folder, target.values["filename"])
+            data = digest_file(filename)
+        else:
+            objects = inputs(target.endpoint, target.values)
+            data = shared + ":" + ":".join(digest(obj) for obj in objects)
+        hashes[target.url] = digest_bytes(f"{target.url}:{data}".encode())
+    return hashes
+
+
+def _build_targets(
+    freezer: Freezer,
+    targets: List[FreezeTarget],
+    jobs: int,
+    engine: str,
+    keep_going: bool,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    # Create all directories upfront so that workers don't race on `makedirs`.
+    for dirname in {os.path.dirname(_filename(freezer, t.url)) for t in targets}:
+        os.makedirs(dirname, exist_ok=True)
+
+    if jobs <= 1 or len(targets) <= 1:
+        return _freeze_targets_with(freezer, targets, engine, keep_going)
+
+    # Strided slices spread the different kinds of pages evenly over the workers.
+    slices = [targets[i::jobs] for i in range(jobs)]
+
+    context = multiprocessing.get_context("fork")
+    with context.Pool(jobs, initializer=_init_worker, initargs=(freezer,)) as pool:
+        results = pool.map(
+            functools.partial(_freeze_targets, engine=engine, keep_going=keep_going),
+            slices,
+            chunksize=1,
+        )
+
+    for i, (records, failures) in enumerate(results):
+        print(f"Worker {i}: froze {len(records)} URLs, {len(failures)} failed")
+    return (
+        [record for records, _ in results for record in records],
+        [failure for _, failures in results for failure in failures],
+    )
+
+
+def _init_worker(freezer: Freezer) -> None:
+    # Forked workers inherit the arguments, they aren't pickled.
+    _worker["freezer"] = freezer
+
+
+def _freeze_targets(
+    targets: List[FreezeTarget], engine: str, keep_going: bool
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    return _freeze_targets_with(_worker["freezer"], targets, engine, keep_going)
+
+
+def _freeze_targets_with(
+    freezer: Freezer, targets: List[FreezeTarget], engine: str, keep_going: bool
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Freezes the targets and returns the time and size of each of them.
+
+    With `keep_going`, the exceptions of failed targets are returned instead of
+    raised. They are formatted here, as tracebacks can't be sent from workers.
+    """
+    records = []
+    failures = []
+    for target in targets:
+        with record_stages() as stages:
+            start = time.perf_counter()
+            try:
+                filename = freeze_target(freezer, target, engine)
+            except Exception as e:  # pylint: disable=broad-except
+                if not keep_going:
+                    raise
+                failures.append(_failure(freezer, target, e))
+                continue
+            seconds = time.perf_counter() - start
+        records.append(
+            {
+                "url": target.url,
+                "endpoint": target.endpoint,
+                "seconds": seconds,
+                "bytes": os.path.getsize(filename),
+                "stages": stages,
+            }
+        )
+    return records, failures
+
+
+def _failure(
+    freezer: Freezer, target: FreezeTarget, error: Exception
+) -> Dict[str, Any]:
+    # Don't leave a partially written or outdated page behind.
+    filename = _filename(freezer, target.url)
+    if os.path.isfile(filename):
+        os.remove(filename)
+    return {
+        "url": target.url,
+        "endpoint": target.endpoint,
+        "values": {key: str(value) for key, value in target.values.items()},
+        "error": f"{type(error).__name__}: {error}",
+        "traceback": traceback.format_exc(),
+    }
+
+
+def _profile_endpoint(
+    freezer: Freezer, targets: List[FreezeTarget], engine: str, endpoint: str
+) -> None:
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for target in targets:
+        if target.endpoint == endpoint:
+            freeze_target(freezer, target, engine)
+    profiler.disable()
+
+    filename = os.path.join(freezer.root, f".freeze_profile_{endpoint}.pstats")
+    profiler.dump_stats(filename)
+    print(f"Wrote the cProfile stats of {endpoint} to {filename}")
+
+
+def freeze_target(freezer: Freezer, target: FreezeTarget, engine: str) -> str:
+    """Writes a single URL with the given engine and returns its filename."""
+    app = freezer.app
+    if engine == "jinja" and target.endpoint and can_render(app, target.endpoint):
+        filename = _filename(freezer, target.url)
+        render_page(app, target.endpoint, target.values, filename)
+        return filename
+
+    # pylint: disable=protected-access
+    return freezer._build_one(target.url)
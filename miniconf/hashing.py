@@ -0,0 +1,54 @@
+import dataclasses
+import hashlib
+import json
+import os
+from datetime import date, datetime
+from typing import Any, Iterable
+
+
+def digest_bytes(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def digest_file(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def digest_files(paths: Iterable[str]) -> str:
+    """Digest over the names and contents of several files."""
+    sha = hashlib.sha256()
+    for path in sorted(paths):
+        sha.update(path.encode())
+        sha.update(digest_file(path).encode())
+    return sha.hexdigest()
+
+
+def digest_directory(directory: str) -> str:
+    paths = [
+        os.path.join(dirpath, filename)
+        for dirpath, _, filenames in os.walk(directory)
+        for filename in filenames
+    ]
+    return digest_files(paths)
+
+
+def digest_data(data: Any) -> str:
+    """Digest of a site data object, i.e. dataclasses, dicts, lists, dates, ..."""
+    serialized = json.dumps(
+        data, sort_keys=True, separators=(",", ":"), default=_to_json
+    )
+    return digest_bytes(serialized.encode())
+
+
+def _to_json(o: Any) -> Any:
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if isinstance(o, (date, datetime)):
+        return o.isoformat()
+    if isinstance(o, (set, frozenset)):
+        return sorted(o, key=repr)
+    return repr(o)
@@ -0,0 +1,58 @@
+from collections import defaultdict
+from types import MappingProxyType
+from typing import Any, DefaultDict, Dict, Hashable, List, Mapping, Sequence, Tuple
+
+from miniconf.site_data import Paper
+
+
+class SiteIndex:
+    """Lookups over the loaded papers.
+
+    The index is built once per load, as the "index" dataset, and every map is
+    read-only with tuples as values, so the routes and the JSON exports can
+    share it instead of scanning or copying the lists. Groups keep the order of
+    the papers in `papers`.
+
+    - `papers`: paper by id
+    - `papers_by_program`: papers by program
+    - `papers_by_program_track`: papers by (program, track)
+    - `tracks_by_program`: the tracks with papers in each program
+    """
+
+    def __init__(self, papers: Sequence[Paper]):
+        self._papers = tuple(papers)
+
+        by_id: Dict[str, Paper] = {}
+        by_program: DefaultDict[str, List[Paper]] = defaultdict(list)
+        by_program_track: DefaultDict[Tuple[str, str], List[Paper]] = defaultdict(list)
+        for paper in papers:
+            content = paper.content
+            assert paper.id not in by_id, paper.id
+            by_id[paper.id] = paper
+            by_program[content.program].append(paper)
+            by_program_track[content.program, content.track].append(paper)
+
+        tracks_by_program: DefaultDict[str, List[str]] = defaultdict(list)
+        for program, track in by_program_track:
+            tracks_by_program[program].append(track)
+
+        self.papers: Mapping[str, Paper] = MappingProxyType(by_id)
+        self.papers_by_program = _freeze(by_program)
+        self.papers_by_program_track = _freeze(by_program_track)
+        self.tracks_by_program = _freeze(tracks_by_program)
+
+    def __reduce__(self):
+        # Mapping proxies can't be pickled, e.g. into a snapshot, but the index
+        # is quickly built again from the papers.
+        return SiteIndex, (self._papers,)
+
+    def __repr__(self) -> str:
+        # Deterministic, for the digests of the site data.
+        return f"SiteIndex({len(self._papers)} papers)"
+
+
+def _freeze(groups: Mapping[Any, Sequence[Any]]) -> Mapping[Any, Tuple[Any, ...]]:
+    frozen: Dict[Hashable, Tuple[Any, ...]] = {
+        key: tuple(values) for key, values in groups.items()
+    }
+    return MappingProxyType(frozen)
@@ -3,15 +3,33 @@ import csv
 import glob
 import itertools
 import json
+import multiprocessing
 import os
+import threading
+import time
 from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import timedelta
-from typing import Any, DefaultDict, Dict, List, Optional, Tuple
+from typing import (
+    Any,
+    Callable,
+    DefaultDict,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
-import jsons
 import pytz
 import yaml
 
+from miniconf.index import SiteIndex
+from miniconf.markup import prerender
 from miniconf.site_data import (
     CommitteeMember,
     Paper,
@@ -28,87 +46,416 @@ from miniconf.site_data import (
     Workshop,
     WorkshopPaper,
 )
+from miniconf.snapshot import load_snapshot, save_snapshot, snapshot_key
+
+# The sitedata files, by their name without the extension.
+REGISTERED_SITEDATA = {
+    "config",
+    # index.html
+    "committee",
+    # schedule.html
+    "overall_calendar",
+    "plenary_sessions",
+    "opening_remarks",
+    # tutorials.html
+    "tutorials",
+    # papers.html
+    "main_papers",
+    "demo_papers",
+    "findings_papers",
+    "paper_recs",
+    "papers_projection",
+    "paper_sessions",
+    # socials.html
+    "socials",
+    # workshops.html
+    "workshops",
+    "workshop_papers",
+    # sponsors.html
+    "sponsors",
+    # about.html
+    "code_of_conduct",
+    "faq",
+}
+
+# CSV files that the stages read row by row, see `CSVRows`. They are the
+# largest files and are not kept in `site_data`.
+STREAMED_SITEDATA = {"main_papers", "demo_papers", "findings_papers"}
+
+DISPLAY_TIME_FORMAT = "%H:%M"
+
+# libyaml parses our files about eight times faster than the Python loader.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Builds datasets from the raw sitedata files and from the datasets of others.
+StageFunction = Callable[[Dict[str, Any], Dict[str, Any], Dict[str, Any]], None]
+
+
+class Stage(NamedTuple):
+    """A step of `load_site_data`.
+
+    `build(raw, site_data, by_uid)` reads the parsed sitedata `files` from `raw`
+    and the `requires` datasets from `site_data`, and sets the `outputs` in
+    `site_data` and the `by_uid` maps.
+    """
+
+    build: StageFunction
+    files: List[str]
+    requires: List[str]
+    outputs: List[str]
+    by_uid: Sequence[str] = ()
 
 
 def load_site_data(
-    site_data_path: str, site_data: Dict[str, Any], by_uid: Dict[str, Any],
+    site_data_path: str,
+    site_data: Dict[str, Any],
+    by_uid: Dict[str, Any],
+    datasets: Optional[Iterable[str]] = None,
+    markdown: Optional[Callable[[str], Any]] = None,
+    jobs: Optional[int] = None,
+    parse_times: Optional[Dict[str, float]] = None,
+    cache_dir: Optional[str] = None,
+    lazy: bool = False,
 ) -> List[str]:
-    """Loads all site data at once.
+    """Loads the site data from the files under `site_data_path`.
+
+    Populates `site_data` and `by_uid`. By default, everything is loaded at
+    once. Otherwise only the files and `STAGES` that are needed for `datasets`
+    are loaded, e.g. `["papers"]` also builds the workshops with their papers,
+    but doesn't parse the sponsors or the calendar. Every sitedata file is also
+    available in `site_data` by its name unless a stage replaces it or it is
+    one of the `STREAMED_SITEDATA`.
+
+    If `markdown` is given, the markdown fields of the loaded data are rendered
+    with it ahead of time, see `miniconf.markup.prerender`.
+
+    The files are parsed by `jobs` processes, by default one per CPU, and the
+    seconds it took to parse each file are added to `parse_times`.
 
-    Populates the `committee` and `by_uid` using files under `site_data_path`.
+    With a `cache_dir`, everything that is loaded at once is also stored there
+    as a snapshot, which is used instead of the files as long as neither they
+    nor the code in `miniconf` changed, see `miniconf.snapshot`.
+
+    With `lazy`, nothing is loaded yet. `site_data` and `by_uid` must be
+    `LazySiteData`, which build each dataset when it is first accessed, and
+    neither `markdown` nor `cache_dir` is used.
+
+    Returns the sitedata files that were parsed, or may be with `lazy`.
 
     NOTE: site_data[filename][field]
     """
-    registered_sitedata = {
-        "config",
-        # index.html
-        "committee",
-        # schedule.html
-        "overall_calendar",
-        "plenary_sessions",
-        "opening_remarks",
-        # tutorials.html
-        "tutorials",
-        # papers.html
-        "main_papers",
-        "demo_papers",
-        "findings_papers",
-        "paper_recs",
-        "papers_projection",
-        "paper_sessions",
-        # socials.html
-        "socials",
-        # workshops.html
-        "workshops",
-        "workshop_papers",
-        # sponsors.html
-        "sponsors",
-        # about.html
-        "code_of_conduct",
-        "faq",
-    }
-    extra_files = []
-    # Load all for your sitedata one time.
+    if lazy:
+        if not isinstance(site_data, LazySiteData) or not isinstance(
+            by_uid, LazySiteData
+        ):
+            raise TypeError("lazy loading needs LazySiteData")
+        loader = LazyLoader(site_data_path, site_data, by_uid)
+        return [loader.files[name] for name in sorted(REGISTERED_SITEDATA)]
+
+    stages = STAGES if datasets is None else required_stages(datasets)
+    if datasets is None:
+        names = set(REGISTERED_SITEDATA)
+    else:
+        names = {name for name in datasets if name in REGISTERED_SITEDATA}
+        names.update(name for stage in stages for name in stage.files)
+
+    files = sitedata_files(site_data_path)
+    assert names <= set(files), names - set(files)
+    paths = [files[name] for name in sorted(names)]
+
+    key = None
+    snapshot = None
+    if cache_dir is not None and datasets is None:
+        key = snapshot_key(paths)
+        snapshot = load_snapshot(cache_dir, key)
+
+    if snapshot is not None:
+        site_data.update(snapshot[0])
+        by_uid.update(snapshot[1])
+    else:
+        raw = _parse_files({name: files[name] for name in names}, jobs, parse_times)
+        site_data.update(_file_datasets(raw))
+
+        for stage in stages:
+            stage.build(raw, site_data, by_uid)
+
+        if key is not None:
+            save_snapshot(cache_dir, key, site_data, by_uid)
+
+    if markdown is not None:
+        prerender(markdown, site_data, by_uid)
+
+    if datasets is None:
+        print("Data Successfully Loaded" + (" from a snapshot" if snapshot else ""))
+    return paths
+
+
+def reload_site_data(
+    site_data_path: str,
+    site_data: Dict[str, Any],
+    by_uid: Dict[str, Any],
+    changed: Iterable[str],
+) -> List[Stage]:
+    """Rebuilds the datasets that depend on the `changed` sitedata files.
+
+    Only the stages returned by `dependent_stages` are run again, on copies of
+    `site_data` and `by_uid` with the files they read parsed again. Then their
+    datasets and `by_uid` maps are swapped in, each dict with a single update,
+    so views never see half of a rebuild. If a stage fails, e.g. on a file that
+    is still being edited, nothing is swapped in.
+
+    Returns the stages that were run. For lazily loaded site data, their
+    datasets are only dropped, to be built again when they are accessed.
+    """
+    loader = getattr(site_data, "loader", None)
+    if loader is not None:
+        return loader.invalidate(changed)
+
+    stages = dependent_stages(changed)
+    files = sitedata_files(site_data_path)
+    names = REGISTERED_SITEDATA.intersection(changed)
+    names.update(name for stage in stages for name in stage.files)
+    raw = _parse_files({name: files[name] for name in names if name in files})
+
+    # Files like "workshops" are replaced by the datasets of the same name.
+    kept = {name for stage in STAGES if stage not in stages for name in stage.outputs}
+    new_site_data = dict(site_data)
+    new_site_data.update(
+        (name, data) for name, data in _file_datasets(raw).items() if name not in kept
+    )
+    new_by_uid = dict(by_uid)
+    for stage in stages:
+        stage.build(raw, new_site_data, new_by_uid)
+
+    site_data.update(new_site_data)
+    by_uid.update(new_by_uid)
+    return stages
+
+
+class LazySiteData(dict):
+    """A dict of site data whose missing keys are built by its `loader`.
+
+    Without a loader, e.g. when everything was loaded at once, it is a dict.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loader: Optional[LazyLoader] = None
+
+    def __missing__(self, key: str) -> Any:
+        if self.loader is not None:
+            self.loader.build(self, key)
+            if key in self:
+                return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+
+class LazyLoader:
+    """Builds the datasets of `site_data` and `by_uid` on first access.
+
+    A dataset is built by the stage of `STAGES` that outputs it, after the
+    datasets that the stage requires, from the files it declares, which are
+    parsed once. The sitedata files are available in `site_data` by their name
+    like after `load_site_data`. Stages without outputs, e.g. checks that only
+    print warnings, are not run.
+    """
+
+    def __init__(
+        self, site_data_path: str, site_data: LazySiteData, by_uid: LazySiteData
+    ):
+        self.files = sitedata_files(site_data_path)
+        self.site_data = site_data
+        self.by_uid = by_uid
+        self.raw: Dict[str, Any] = {}
+        self.built: Set[int] = set()
+        self.producers = {output: stage for stage in STAGES for output in stage.outputs}
+        self.uid_producers = {name: stage for stage in STAGES for name in stage.by_uid}
+        # Requests of the dev server access the datasets from several threads.
+        self.lock = threading.RLock()
+        site_data.loader = self
+        by_uid.loader = self
+
+    def build(self, data: LazySiteData, key: str) -> None:
+        with self.lock:
+            if data is self.by_uid:
+                if key in self.uid_producers:
+                    self._run(self.uid_producers[key])
+            elif key in self.producers:
+                self._run(self.producers[key])
+            elif key in REGISTERED_SITEDATA:
+                self._parse([key])
+
+    def invalidate(self, changed: Iterable[str]) -> List[Stage]:
+        """Drops what depends on the `changed` files and returns their stages."""
+        with self.lock:
+            stages = dependent_stages(changed)
+            # Stages may change the parsed files, e.g. the calendar.
+            names = set(changed).union(*(stage.files for stage in stages))
+            for name in names:
+                if self.raw.pop(name, None) is not None:
+                    if name not in self.producers:
+                        self.site_data.pop(name, None)
+            for stage in stages:
+                self.built.discard(id(stage))
+                for output in stage.outputs:
+                    self.site_data.pop(output, None)
+                for name in stage.by_uid:
+                    self.by_uid.pop(name, None)
+            return stages
+
+    def _run(self, stage: Stage) -> None:
+        if id(stage) in self.built:
+            return
+        for dataset in stage.requires:
+            self.site_data[dataset]  # pylint: disable=pointless-statement
+        raw = self._parse(stage.files)
+        # E.g. the sponsors are built from the file in `site_data`.
+        for name in stage.files:
+            if name in stage.outputs:
+                dict.__setitem__(self.site_data, name, raw[name])
+        stage.build(raw, self.site_data, self.by_uid)
+        self.built.add(id(stage))
+
+    def _parse(self, names: Iterable[str]) -> Dict[str, Any]:
+        missing = [name for name in names if name not in self.raw]
+        if missing:
+            parsed = _parse_files({name: self.files[name] for name in missing})
+            self.raw.update(parsed)
+            for name, data in _file_datasets(parsed).items():
+                if name not in self.producers:
+                    dict.__setitem__(self.site_data, name, data)
+        return {name: self.raw[name] for name in names}
+
+
+def sitedata_files(site_data_path: str) -> Dict[str, str]:
+    """The paths of the sitedata files under `site_data_path` by their names."""
+    files = {}
     for f in glob.glob(site_data_path + "/*"):
         filename = os.path.basename(f)
         if filename == "inbox":
             continue
-        name, typ = filename.split(".")
-        if name not in registered_sitedata:
-            continue
+        name, _ = filename.split(".")
+        files[name] = f
+    return files
+
+
+def _parse_files(
+    files: Dict[str, str],
+    jobs: Optional[int] = 1,
+    parse_times: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    streamed = STREAMED_SITEDATA.intersection(files)
+    names = sorted(set(files) - streamed)
+    jobs = min(jobs or os.cpu_count() or 1, len(names))
+    if jobs <= 1:
+        results = [_parse_file(files[name]) for name in names]
+    else:
+        # The largest files first, so that the processes finish at the same time.
+        names.sort(key=lambda name: os.path.getsize(files[name]), reverse=True)
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(jobs, mp_context=context) as pool:
+            results = list(pool.map(_parse_file, [files[name] for name in names]))
 
-        extra_files.append(f)
-        if typ == "json":
-            site_data[name] = json.load(open(f))
-        elif typ in {"csv", "tsv"}:
-            site_data[name] = list(csv.DictReader(open(f)))
-        elif typ == "yml":
-            site_data[name] = yaml.load(open(f).read(), Loader=yaml.SafeLoader)
-    assert set(site_data.keys()) == registered_sitedata, registered_sitedata - set(
-        site_data.keys()
-    )
+    raw: Dict[str, Any] = {}
+    for name, (data, seconds) in sorted(zip(names, results), key=lambda r: r[0]):
+        raw[name] = data
+        if parse_times is not None:
+            parse_times[name] = seconds
+    # Read by the stages that use them.
+    for name in sorted(streamed):
+        raw[name] = CSVRows(files[name])
+    return dict(sorted(raw.items()))
+
+
+def _file_datasets(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """The parsed files of `raw` that are kept in `site_data`."""
+    return {name: data for name, data in raw.items() if name not in STREAMED_SITEDATA}
 
-    display_time_format = "%H:%M"
 
+class CSVRows:
+    """The rows of a CSV file, which is read again each time they are iterated.
+
+    Unlike a list of all rows, only the current row is in memory.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        with open(self.path) as f:
+            yield from csv.DictReader(f)
+
+
+def _parse_file(f: str) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    typ = f.rsplit(".", 1)[-1]
+    data = None
+    if typ == "json":
+        data = json.load(open(f))
+    elif typ in {"csv", "tsv"}:
+        data = list(csv.DictReader(open(f)))
+    elif typ == "yml":
+        data = yaml.load(open(f).read(), Loader=YAML_LOADER)
+    return data, time.perf_counter() - start
+
+
+def required_stages(datasets: Iterable[str]) -> List[Stage]:
+    """The stages that build `datasets` and the datasets they require, in order."""
+    producers = {output: stage for stage in STAGES for output in stage.outputs}
+    required: Set[int] = set()
+    pending = [name for name in datasets if name in producers]
+    while pending:
+        stage = producers[pending.pop()]
+        if id(stage) not in required:
+            required.add(id(stage))
+            pending.extend(stage.requires)
+    return [stage for stage in STAGES if id(stage) in required]
+
+
+def dependent_stages(files: Iterable[str]) -> List[Stage]:
+    """The stages that read `files` and the stages that require their outputs.
+
+    E.g. "paper_sessions" affects the calendar, the papers, the Q&A sessions
+    and, through the papers, the index, while "sponsors" only affects the
+    sponsors.
+    """
+    changed = set(files)
+    outputs: Set[str] = set()
+    dependent = []
+    # A stage only requires the outputs of stages before it.
+    for stage in STAGES:
+        if changed.intersection(stage.files) or outputs.intersection(stage.requires):
+            dependent.append(stage)
+            outputs.update(stage.outputs)
+    return dependent
+
+
+def _load_committee(raw, site_data, _by_uid) -> None:
     # index.html
-    site_data["committee"] = build_committee(site_data["committee"]["committee"])
+    site_data["committee"] = build_committee(raw["committee"]["committee"])
 
+
+def _load_calendar(raw, site_data, _by_uid) -> None:
     # schedule.html
-    generate_plenary_events(site_data)
-    generate_tutorial_events(site_data)
-    generate_workshop_events(site_data)
-    generate_paper_events(site_data)
-    generate_social_events(site_data)
-
-    site_data["calendar"] = build_schedule(site_data["overall_calendar"])
-    site_data["event_types"] = list(
-        {event["type"] for event in site_data["overall_calendar"]}
+    generate_plenary_events(raw)
+    generate_tutorial_events(raw)
+    generate_workshop_events(raw)
+    generate_paper_events(raw)
+    generate_social_events(raw)
+
+    site_data["calendar"] = build_schedule(raw["overall_calendar"])
+    site_data["event_types"] = sorted(
+        {event["type"] for event in raw["overall_calendar"]}
     )
+    # tutorials.html
+    site_data["tutorial_calendar"] = build_tutorial_schedule(raw["overall_calendar"])
+
 
+def _load_plenary_sessions(raw, site_data, by_uid) -> None:
     # plenary_sessions.html
     plenary_sessions = build_plenary_sessions(
-        raw_plenary_sessions=site_data["plenary_sessions"],
-        raw_plenary_videos={"opening_remarks": site_data["opening_remarks"]},
+        raw_plenary_sessions=raw["plenary_sessions"],
+        raw_plenary_videos={"opening_remarks": raw["opening_remarks"]},
     )
 
     site_data["plenary_sessions"] = plenary_sessions
@@ -122,50 +469,41 @@ def load_site_data(
     ]
     site_data["plenary_session_days"][0][-1] = "active"
 
-    # Papers' progam to their data
-    for p in site_data["main_papers"]:
-        p["program"] = "main"
-
-    for p in site_data["demo_papers"]:
-        p["program"] = "demo"
-
-    for p in site_data["findings_papers"]:
-        p["program"] = "findings"
-        p["paper_type"] = "Findings"
-        p["track"] = "Findings of EMNLP"
 
+def _load_programs(_raw, site_data, _by_uid) -> None:
     site_data["programs"] = ["main", "demo", "findings", "workshop"]
 
+
+def _load_tutorials(raw, site_data, by_uid) -> None:
     # tutorials.html
-    tutorials = build_tutorials(site_data["tutorials"])
+    tutorials = build_tutorials(raw["tutorials"])
     site_data["tutorials"] = tutorials
-    site_data["tutorial_calendar"] = build_tutorial_schedule(
-        site_data["overall_calendar"]
-    )
     # tutorial_<uid>.html
     by_uid["tutorials"] = {tutorial.id: tutorial for tutorial in tutorials}
 
+
+def _load_workshops(raw, site_data, by_uid) -> None:
     # workshops.html
     workshops = build_workshops(
-        raw_workshops=site_data["workshops"],
-        raw_workshop_papers=site_data["workshop_papers"],
+        raw_workshops=raw["workshops"], raw_workshop_papers=raw["workshop_papers"],
     )
     site_data["workshops"] = workshops
     # workshop_<uid>.html
     by_uid["workshops"] = {workshop.id: workshop for workshop in workshops}
 
+
+def _load_socials(raw, site_data, _by_uid) -> None:
     # socials.html
-    social_events = build_socials(site_data["socials"])
-    site_data["socials"] = social_events
+    site_data["socials"] = build_socials(raw["socials"])
+
 
+def _load_papers(raw, site_data, by_uid) -> None:
     # papers.{html,json}
     papers = build_papers(
-        raw_papers=site_data["main_papers"]
-        + site_data["demo_papers"]
-        + site_data["findings_papers"],
-        paper_sessions=site_data["paper_sessions"],
-        paper_recs=site_data["paper_recs"],
-        paper_images_path=site_data["config"]["paper_images_path"],
+        raw_papers=paper_rows(raw),
+        paper_sessions=raw["paper_sessions"],
+        paper_recs=raw["paper_recs"],
+        paper_images_path=raw["config"]["paper_images_path"],
     )
     for wsh in site_data["workshops"]:
         papers.extend(wsh.papers)
@@ -192,35 +530,111 @@ def load_site_data(
         papers_by_uid[paper.id] = paper
     by_uid["papers"] = papers_by_uid
 
+
+def _check_papers_projection(raw, _site_data, by_uid) -> None:
     # serve_papers_projection.json
-    all_paper_ids_with_projection = {
-        item["id"] for item in site_data["papers_projection"]
-    }
+    all_paper_ids_with_projection = {item["id"] for item in raw["papers_projection"]}
     for paper_id in set(by_uid["papers"].keys()) - all_paper_ids_with_projection:
         paper = by_uid["papers"][paper_id]
         if paper.content.program == "main":
             print(f"WARNING: {paper_id} does not have a projection")
 
+
+def _load_faq(raw, site_data, _by_uid) -> None:
+    # about.html
+    site_data["faq"] = raw["faq"]["FAQ"]
+
+
+def _load_code_of_conduct(raw, site_data, _by_uid) -> None:
     # about.html
-    site_data["faq"] = site_data["faq"]["FAQ"]
-    site_data["code_of_conduct"] = site_data["code_of_conduct"]["CodeOfConduct"]
+    site_data["code_of_conduct"] = raw["code_of_conduct"]["CodeOfConduct"]
 
+
+def _load_sponsors(_raw, site_data, by_uid) -> None:
     # sponsors.html
-    build_sponsors(site_data, by_uid, display_time_format)
+    build_sponsors(site_data, by_uid, DISPLAY_TIME_FORMAT)
+
+
+def _load_index(_raw, site_data, _by_uid) -> None:
+    # papers_<program>.json, track_<program>_<track>.json and lookups
+    site_data["index"] = SiteIndex(site_data["papers"])
+
 
+def _load_qa_sessions(raw, site_data, _by_uid) -> None:
     # qa_sessions.html
     site_data["qa_sessions"], site_data["qa_session_days"] = build_qa_sessions(
-        site_data["paper_sessions"]
+        raw["paper_sessions"]
     )
-    site_data["qa_sessions_by_day"] = {
-        day: list(sessions)
-        for day, sessions in itertools.groupby(
-            site_data["qa_sessions"], lambda qa: qa.day
-        )
-    }
-
-    print("Data Successfully Loaded")
-    return extra_files
+    qa_sessions_by_day: DefaultDict[str, List[QaSession]] = defaultdict(list)
+    for qa_session in site_data["qa_sessions"]:
+        qa_sessions_by_day[qa_session.day].append(qa_session)
+    site_data["qa_sessions_by_day"] = dict(qa_sessions_by_day)
+
+
+STAGES = [
+    Stage(_load_committee, ["committee"], [], ["committee"]),
+    Stage(
+        _load_calendar,
+        [
+            "overall_calendar",
+            "plenary_sessions",
+            "tutorials",
+            "workshops",
+            "paper_sessions",
+            "socials",
+        ],
+        [],
+        ["overall_calendar", "calendar", "event_types", "tutorial_calendar"],
+    ),
+    Stage(
+        _load_plenary_sessions,
+        ["plenary_sessions", "opening_remarks"],
+        [],
+        ["plenary_sessions", "plenary_session_days"],
+        ["plenary_sessions"],
+    ),
+    Stage(_load_programs, [], [], ["programs"]),
+    Stage(_load_tutorials, ["tutorials"], [], ["tutorials"], ["tutorials"]),
+    Stage(
+        _load_workshops,
+        ["workshops", "workshop_papers"],
+        [],
+        ["workshops"],
+        ["workshops"],
+    ),
+    Stage(_load_socials, ["socials"], [], ["socials"]),
+    Stage(
+        _load_papers,
+        [
+            "config",
+            "main_papers",
+            "demo_papers",
+            "findings_papers",
+            "paper_sessions",
+            "paper_recs",
+        ],
+        ["workshops"],
+        ["papers", "tracks", "main_program_tracks"],
+        ["papers"],
+    ),
+    Stage(_check_papers_projection, ["papers_projection"], ["papers"], []),
+    Stage(_load_faq, ["faq"], [], ["faq"]),
+    Stage(_load_code_of_conduct, ["code_of_conduct"], [], ["code_of_conduct"]),
+    Stage(
+        _load_qa_sessions,
+        ["paper_sessions"],
+        [],
+        ["qa_sessions", "qa_session_days", "qa_sessions_by_day"],
+    ),
+    Stage(_load_index, [], ["papers"], ["index"]),
+    Stage(
+        _load_sponsors,
+        ["sponsors"],
+        [],
+        ["sponsors", "sponsors_by_level", "sponsor_levels"],
+        ["sponsors"],
+    ),
+]
 
 
 def extract_list_field(v, key):
@@ -238,6 +652,9 @@ def build_committee(
     # groups by name, i.e. the general chair would not be on top anymore because it doesn't start with A.
     # See https://github.com/pallets/jinja/issues/250
 
+    # jsons is slow to import and only needed here.
+    import jsons  # pylint: disable=import-outside-toplevel
+
     committee = [jsons.load(item, cls=CommitteeMember) for item in raw_committee]
     committee_by_role = OrderedDict()
     for role, members in itertools.groupby(committee, lambda member: member.role):
@@ -625,8 +1042,26 @@ def get_card_image_path_for_paper(paper_id: str, paper_images_path: str) -> str:
     return f"{paper_images_path}/{paper_id}.png"
 
 
+def paper_rows(raw: Dict[str, Iterable[Dict[str, str]]]) -> Iterator[Dict[str, str]]:
+    """The rows of the paper CSV files in `raw`, with the program of each paper."""
+    # Papers' progam to their data
+    for p in raw["main_papers"]:
+        p["program"] = "main"
+        yield p
+
+    for p in raw["demo_papers"]:
+        p["program"] = "demo"
+        yield p
+
+    for p in raw["findings_papers"]:
+        p["program"] = "findings"
+        p["paper_type"] = "Findings"
+        p["track"] = "Findings of EMNLP"
+        yield p
+
+
 def build_papers(
-    raw_papers: List[Dict[str, str]],
+    raw_papers: Iterable[Dict[str, str]],
     paper_sessions: Dict[str, Any],
     paper_recs: Dict[str, List[str]],
     paper_images_path: str,
@@ -643,6 +1078,8 @@ def build_papers(
     - pdf_url: str
     - demo_url: str
 
+    The `raw_papers` are only iterated once, so they can be streamed from the
+    CSV files, see `paper_rows`.
     """
     # build the lookup from (paper, slot) to zoom_link
     paper_id_to_link: Dict[str, str] = {}
@@ -828,12 +1265,6 @@ def build_tutorials(raw_tutorials: List[Dict[str, Any]]) -> List[Tutorial]:
 def build_workshops(
     raw_workshops: List[Dict[str, Any]], raw_workshop_papers: List[Dict[str, Any]],
 ) -> List[Workshop]:
-    def workshop_title(workshop_id):
-        for wsh in raw_workshops:
-            if wsh["UID"] == workshop_id:
-                return wsh["title"]
-        return ""
-
     def build_workshop_blocks(t: Dict[str, Any]) -> List[SessionInfo]:
         blocks = compute_schedule_blocks(t["sessions"], leeway=timedelta(hours=1))
         if len(blocks) == 0:
@@ -859,6 +1290,7 @@ def build_workshops(
         grouped_papers[paper["workshop"]].append(paper)
 
     ws_id_to_alias: Dict[str, str] = {w["UID"]: w["alias"] for w in raw_workshops}
+    ws_id_to_title: Dict[str, str] = {w["UID"]: w["title"] for w in raw_workshops}
 
     workshop_papers: DefaultDict[str, List[WorkshopPaper]] = defaultdict(list)
     for workshop_id, papers in grouped_papers.items():
@@ -873,7 +1305,7 @@ def build_workshops(
                     content=PaperContent(
                         title=item["title"],
                         authors=extract_list_field(item, "authors"),
-                        track=workshop_title(workshop_id),
+                        track=ws_id_to_title.get(workshop_id, ""),
                         paper_type="Workshop",
                         abstract=item.get("abstract"),
                         tldr=item["abstract"][:250] + "..."
@@ -982,17 +1414,6 @@ def build_sponsors(site_data, by_uid, display_time_format) -> None:
         sponsor["zoom_times"] = generate_schedule(sponsor.get("schedule", []))
         sponsor["gather_times"] = generate_schedule(sponsor.get("gather_schedule", []))
 
-        publications = sponsor.get("publications")
-        if not publications:
-            continue
-
-        grouped_publications: Dict[str, List[Any]] = defaultdict(list)
-        for paper_id in publications:
-            paper = by_uid["papers"][paper_id]
-            grouped_publications[paper.content.paper_type].append(paper)
-
-        sponsor["grouped_publications"] = grouped_publications
-
     # In the YAML, we just have a list of sponsors. We group them here by level
     sponsors_by_level: DefaultDict[str, List[Any]] = defaultdict(list)
     for sponsor in site_data["sponsors"]:
@@ -1002,8 +1423,7 @@ def build_sponsors(site_data, by_uid, display_time_format) -> None:
             for level in sponsor["levels"]:
                 sponsors_by_level[level].append(sponsor)
 
-    site_data["sponsors_by_level"] = sponsors_by_level
-    site_data["sponsor_levels"] = [
+    sponsor_levels = [
         "Diamond",
         "Platinum",
         "Gold",
@@ -1014,8 +1434,15 @@ def build_sponsors(site_data, by_uid, display_time_format) -> None:
         "Diversity & Inclusion: Champion",
         "Diversity & Inclusion: In-Kind",
     ]
+    assert all(lvl in sponsor_levels for lvl in sponsors_by_level)
+
+    # Add the empty levels here, since otherwise rendering `sponsors.html` would
+    # add them to the defaultdict and the result would depend on the render order.
+    for level in sponsor_levels:
+        sponsors_by_level.setdefault(level, [])
 
-    assert all(lvl in site_data["sponsor_levels"] for lvl in sponsors_by_level)
+    site_data["sponsors_by_level"] = sponsors_by_level
+    site_data["sponsor_levels"] = sponsor_levels
 
 
 def compute_schedule_blocks(
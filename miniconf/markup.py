@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator
+
+from flask import Flask
+from markupsafe import Markup
+
+from miniconf.hashing import digest_bytes
+
+DEFAULT_MARKDOWN_CACHE_SIZE = 4096
+
+
+def init_app(app: Flask) -> "MarkdownCache":
+    """Replaces the `markdown` filter of Flask-Markdown by a `MarkdownCache`.
+
+    Must be called after `Markdown(app)`. The size of the cache is
+    `MARKDOWN_CACHE_SIZE`.
+    """
+    size = app.config.setdefault("MARKDOWN_CACHE_SIZE", DEFAULT_MARKDOWN_CACHE_SIZE)
+    cache = MarkdownCache(app.jinja_env.filters["markdown"], size)
+    app.jinja_env.filters["markdown"] = cache
+    return cache
+
+
+class MarkdownCache:
+    """Memoizes the HTML of a markdown filter by the digest of the text.
+
+    The same abstracts, bios and FAQ answers are rendered on many pages, so each
+    distinct text is only converted once. At most `maxsize` texts are kept and
+    the least recently used one is evicted first.
+    """
+
+    def __init__(self, convert: Callable[[str], Markup], maxsize: int):
+        self.convert = convert
+        self.maxsize = maxsize
+        self.html: "OrderedDict[str, Markup]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # The dev server renders pages in threads.
+        self._lock = threading.Lock()
+
+    def __call__(self, text: str) -> Markup:
+        if not isinstance(text, str):
+            return self.convert(text)
+
+        key = digest_bytes(text.encode())
+        with self._lock:
+            html = self.html.get(key)
+            if html is not None:
+                self.hits += 1
+                self.html.move_to_end(key)
+                return html
+            self.misses += 1
+
+        # Converted outside of the lock, at worst twice for the same text.
+        html = self.convert(text)
+        with self._lock:
+            self.html[key] = html
+            if len(self.html) > self.maxsize:
+                self.html.popitem(last=False)
+                self.evictions += 1
+        return html
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.html),
+            "maxsize": self.maxsize,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self.html.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+def prerender(
+    markdown: Callable[[str], Any], site_data: Dict[str, Any], by_uid: Dict[str, Any]
+) -> int:
+    """Renders the markdown fields of the loaded site data with `markdown`.
+
+    With a `MarkdownCache`, this fills the cache before the pages are rendered,
+    e.g. once in the parent of the freeze worker processes instead of in each
+    of them. Returns the number of texts.
+    """
+    texts = [text for text in markdown_texts(site_data, by_uid) if text]
+    for text in texts:
+        markdown(text)
+    return len(texts)
+
+
+def markdown_texts(site_data: Dict[str, Any], by_uid: Dict[str, Any]) -> Iterator[str]:
+    """The texts of the site data that the templates render as markdown."""
+    for plenary_session in by_uid.get("plenary_sessions", {}).values():
+        yield from (plenary_session.abstract, plenary_session.bio)
+    for sponsor in by_uid.get("sponsors", {}).values():
+        yield sponsor.get("description")
+        for times in ("zoom_times", "gather_times"):
+            for zooms in sponsor.get(times, {}).values():
+                yield from (label for _, label in zooms)
+    for workshop in by_uid.get("workshops", {}).values():
+        yield from (event.session_name for event in workshop.sessions)
+    for paper in by_uid.get("papers", {}).values():
+        if paper.content.material:
+            yield from paper.content.material.split("|")
+    for section in site_data.get("faq", []):
+        yield from (qa["Answer"] for qa in section["QA"])
+    if "code_of_conduct" in site_data:
+        yield site_data["code_of_conduct"]
@@ -0,0 +1,209 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from flask import Flask, Response, g, request
+
+from miniconf import timing
+from miniconf.profiling import STAGES
+
+# The upper bounds in seconds of the buckets of the latency histograms.
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+# Relative to the root path of the app.
+PROFILE_DIRECTORY = os.path.join(".cache", "profiles")
+
+
+class Metrics:
+    """The request counts, latencies, sizes and stage times of each endpoint.
+
+    `observe` takes the same values as the records of the freeze, i.e. the
+    seconds and bytes of a page and the seconds of its `timing.stage`s.
+    """
+
+    def __init__(self):
+        self.endpoints: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(
+        self, endpoint: str, seconds: float, size: int, stages: Dict[str, float]
+    ) -> None:
+        with self._lock:
+            if endpoint not in self.endpoints:
+                self.endpoints[endpoint] = {
+                    "requests": 0,
+                    "seconds": 0.0,
+                    "buckets": [0] * len(LATENCY_BUCKETS),
+                    "bytes": 0,
+                    "stages": {stage: 0.0 for stage in STAGES},
+                }
+            metrics = self.endpoints[endpoint]
+            metrics["requests"] += 1
+            metrics["seconds"] += seconds
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    metrics["buckets"][i] += 1
+            metrics["bytes"] += size
+            for stage in STAGES:
+                metrics["stages"][stage] += stages.get(stage, 0.0)
+
+    def to_json(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                endpoint: {
+                    **metrics,
+                    "buckets": dict(zip(map(str, LATENCY_BUCKETS), metrics["buckets"])),
+                    "stages": dict(metrics["stages"]),
+                }
+                for endpoint, metrics in self.endpoints.items()
+            }
+
+    def to_prometheus(self) -> str:
+        """The metrics in the text format of Prometheus."""
+        lines = [
+            "# HELP miniconf_request_duration_seconds Time to respond to a request.",
+            "# TYPE miniconf_request_duration_seconds histogram",
+        ]
+        endpoints = self.to_json()
+        for endpoint, metrics in sorted(endpoints.items()):
+            label = f'endpoint="{endpoint}"'
+            for bound, count in metrics["buckets"].items():
+                lines.append(
+                    f'miniconf_request_duration_seconds_bucket{{{label},le="{bound}"}} '
+                    f"{count}"
+                )
+            lines += [
+                f'miniconf_request_duration_seconds_bucket{{{label},le="+Inf"}} '
+                f"{metrics['requests']}",
+                f"miniconf_request_duration_seconds_sum{{{label}}} {metrics['seconds']}",
+                f"miniconf_request_duration_seconds_count{{{label}}} "
+                f"{metrics['requests']}",
+            ]
+        lines += [
+            "# HELP miniconf_response_bytes_total Bytes of the response bodies.",
+            "# TYPE miniconf_response_bytes_total counter",
+        ]
+        for endpoint, metrics in sorted(endpoints.items()):
+            lines.append(
+                f'miniconf_response_bytes_total{{endpoint="{endpoint}"}} '
+                f"{metrics['bytes']}"
+            )
+        lines += [
+            "# HELP miniconf_stage_seconds_total Time spent in the stages of requests.",
+            "# TYPE miniconf_stage_seconds_total counter",
+        ]
+        for endpoint, metrics in sorted(endpoints.items()):
+            for stage, seconds in metrics["stages"].items():
+                lines.append(
+                    f'miniconf_stage_seconds_total{{endpoint="{endpoint}",'
+                    f'stage="{stage}"}} {seconds}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+def init_app(app: Flask, profile_slower_than: Optional[float] = None) -> Metrics:
+    """Records the `Metrics` of every request and serves them at /_debug/metrics.
+
+    They are in the text format of Prometheus, or JSON with `?format=json`. Each
+    response gets an `X-Render-Time` header with the milliseconds until the view
+    returned; streamed bodies are recorded in the metrics once they were sent.
+    With `profile_slower_than`, every request is profiled and the cProfile
+    stats of requests that took longer than that many seconds are written to
+    `METRICS_PROFILE_DIR`. The metrics are per process, see `PreforkServer`.
+    """
+    metrics = Metrics()
+    profile_directory = app.config.setdefault(
+        "METRICS_PROFILE_DIR", os.path.join(app.root_path, PROFILE_DIRECTORY)
+    )
+    # Only one profiler can be active at a time.
+    profiler_lock = threading.Lock()
+
+    @app.before_request
+    def start_request():
+        g.request_start = time.perf_counter()
+        g.request_stages, g.request_stages_token = timing.start_recording()
+        g.request_profiler = None
+        if profile_slower_than is not None and profiler_lock.acquire(blocking=False):
+            g.request_profiler = cProfile.Profile()
+            g.request_profiler.enable()
+
+    @app.after_request
+    def finish_request(response: Response) -> Response:
+        if "request_start" not in g:
+            return response
+        start = g.request_start
+        stages = g.request_stages
+        # From here on `record` stops the recording and the profiler.
+        token = g.pop("request_stages_token")
+        profiler = g.pop("request_profiler")
+        endpoint = request.endpoint or "<unknown>"
+        path = request.full_path.rstrip("?")
+        render_time = time.perf_counter() - start
+        response.headers["X-Render-Time"] = f"{render_time * 1000:.1f}"
+        size = [response.content_length or 0]
+        streamed = response.content_length is None and response.is_streamed
+        if streamed and not response.direct_passthrough:
+            response.response = _count_bytes(response.response, size)
+
+        def record():
+            seconds = time.perf_counter() - start
+            timing.stop_recording(token)
+            metrics.observe(endpoint, seconds, size[0], stages)
+            if profiler is not None:
+                profiler.disable()
+                profiler_lock.release()
+                if seconds > profile_slower_than:
+                    _dump_profile(profiler, profile_directory, endpoint, path, seconds)
+
+        # Werkzeug doesn't close responses that pass their body through, e.g.
+        # static files.
+        if response.direct_passthrough:
+            record()
+        else:
+            response.call_on_close(record)
+        return response
+
+    @app.teardown_request
+    def abort_request(_error):
+        # E.g. an after_request function failed before `finish_request`.
+        if "request_stages_token" in g:
+            timing.stop_recording(g.pop("request_stages_token"))
+        profiler = g.pop("request_profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            profiler_lock.release()
+
+    def serve_metrics():
+        if request.args.get("format") == "json":
+            return Response(
+                json.dumps(metrics.to_json(), indent=1, sort_keys=True),
+                mimetype="application/json",
+            )
+        return Response(metrics.to_prometheus(), mimetype="text/plain")
+
+    app.add_url_rule("/_debug/metrics", "debug_metrics", serve_metrics)
+    return metrics
+
+
+def _count_bytes(chunks: Iterable[Any], size: List[int]) -> Iterator[Any]:
+    for chunk in chunks:
+        size[0] += len(chunk)
+        yield chunk
+
+
+def _dump_profile(
+    profiler: cProfile.Profile,
+    directory: str,
+    endpoint: str,
+    path: str,
+    seconds: float,
+) -> None:
+    os.makedirs(directory, exist_ok=True)
+    filename = os.path.join(
+        directory, f"{endpoint}-{time.strftime('%Y%m%d-%H%M%S')}-{seconds:.2f}s.pstats"
+    )
+    profiler.dump_stats(filename)
+    print(f"Wrote the cProfile stats of {path} ({seconds:.2f}s) to {filename}")
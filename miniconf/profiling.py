@@ -0,0 +1,86 @@
+import json
+import os
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from miniconf.timing import summarize
+
+REPORT_FILENAME = ".freeze_profile.json"
+SUMMARY_FILENAME = ".freeze_profile.txt"
+
+# The time of a page that is spent in one of these stages, see `timing.stage`.
+STAGES = ["template", "serialization"]
+
+
+def endpoint_report(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Aggregates the records of the frozen URLs by their endpoint.
+
+    Each record has the `endpoint`, the `seconds` it took to write the URL, the
+    `bytes` written and the seconds spent in each of the `stages`.
+    """
+    grouped: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for record in records:
+        grouped[record["endpoint"] or "<unknown>"].append(record)
+
+    report = {}
+    for endpoint, endpoint_records in grouped.items():
+        report[endpoint] = {
+            "urls": len(endpoint_records),
+            "seconds": summarize([record["seconds"] for record in endpoint_records]),
+            "bytes": sum(record["bytes"] for record in endpoint_records),
+            "stages": {
+                stage: sum(
+                    record["stages"].get(stage, 0.0) for record in endpoint_records
+                )
+                for stage in STAGES
+            },
+        }
+    return report
+
+
+def format_summary(report: Dict[str, Dict[str, Any]]) -> str:
+    """A table of the endpoints, the slowest endpoint first."""
+    lines = [
+        "{:<20} {:>6} {:>8} {:>8} {:>8} {:>8} {:>9} {:>9} {:>9}".format(
+            "endpoint",
+            "urls",
+            "total s",
+            "p50 ms",
+            "p95 ms",
+            "max ms",
+            "MB",
+            "template",
+            "serialize",
+        )
+    ]
+    for endpoint, stats in sorted(
+        report.items(), key=lambda item: item[1]["seconds"]["total"], reverse=True
+    ):
+        seconds = stats["seconds"]
+        lines.append(
+            "{:<20} {:>6} {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f} {:>9.2f} {:>9.2f} {:>9.2f}".format(
+                endpoint,
+                stats["urls"],
+                seconds["total"],
+                seconds["p50"] * 1000,
+                seconds["p95"] * 1000,
+                seconds["max"] * 1000,
+                stats["bytes"] / 2 ** 20,
+                stats["stages"]["template"],
+                stats["stages"]["serialization"],
+            )
+        )
+    return "\n".join(lines)
+
+
+def write_report(records: List[Dict[str, Any]], root: str) -> Dict[str, Dict[str, Any]]:
+    """Writes the per endpoint report as JSON and as a text summary to `root`."""
+    report = endpoint_report(records)
+    with open(os.path.join(root, REPORT_FILENAME), "w") as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+
+    summary = format_summary(report)
+    with open(os.path.join(root, SUMMARY_FILENAME), "w") as f:
+        f.write(summary + "\n")
+    print(summary)
+    return report
@@ -0,0 +1,140 @@
+import functools
+import os
+import shutil
+from typing import Any, Callable, Dict, Iterator, List, Mapping, TextIO
+
+from flask import Flask, current_app, render_template
+
+from miniconf import timing
+
+# The number of characters that `iter_json` collects before it yields them.
+JSON_CHUNK_SIZE = 1 << 16
+
+
+def templated(template_name: str) -> Callable:
+    """Decorates a view that returns the context for `template_name`.
+
+    The undecorated view stays available as `view.template_context`, so that
+    the page can be rendered without going through a request, see `render_page`.
+    """
+
+    def decorator(f: Callable[..., Dict[str, Any]]) -> Callable[..., str]:
+        @functools.wraps(f)
+        def view(*args, **kwargs):
+            context = f(*args, **kwargs)
+            with timing.stage("template"):
+                return render_template(template_name, **context)
+
+        view.template_name = template_name  # type: ignore
+        view.template_context = f  # type: ignore
+        return view
+
+    return decorator
+
+
+def json_view(f: Callable[..., Any]) -> Callable:
+    """Decorates a view that returns the data of a `json_response`.
+
+    The undecorated view stays available as `view.json_data`, so that the file
+    can be written without going through a request, see `render_page`.
+    """
+
+    @functools.wraps(f)
+    def view(*args, **kwargs):
+        return json_response(f(*args, **kwargs))
+
+    view.json_data = f  # type: ignore
+    return view
+
+
+def json_response(data: Any):
+    """Like `jsonify`, but streams the JSON in chunks, see `iter_json`."""
+    # pylint: disable=protected-access
+    app = current_app._get_current_object()  # type: ignore[attr-defined]
+    return app.response_class(iter_json(app, data), mimetype=app.json.mimetype)
+
+
+def iter_json(app: Flask, data: Any) -> Iterator[str]:
+    """Yields the JSON of `jsonify(data)` in chunks.
+
+    Lists and tuples are encoded element by element with the JSON provider of
+    the app, so the whole document is never in memory, however many papers
+    there are. The time is recorded as the serialization stage.
+    """
+    dump_args: Dict[str, Any] = {"separators": (",", ":")}
+    compact = getattr(app.json, "compact", None)
+    if compact is False or (compact is None and app.debug):
+        dump_args = {"indent": 2}
+
+    if not isinstance(data, (list, tuple)) or not data:
+        with timing.stage("serialization"):
+            yield app.json.dumps(data, **dump_args) + "\n"
+        return
+
+    if "indent" in dump_args:
+        start, separator, end = "[\n  ", ",\n  ", "\n]\n"
+    else:
+        start, separator, end = "[", ",", "]\n"
+    chunk: List[str] = [start]
+    size = 0
+    for i, element in enumerate(data):
+        with timing.stage("serialization"):
+            encoded = app.json.dumps(element, **dump_args)
+        if "indent" in dump_args:
+            # Strings in JSON don't contain raw newlines.
+            encoded = encoded.replace("\n", "\n  ")
+        if i:
+            chunk.append(separator)
+        chunk.append(encoded)
+        size += len(encoded)
+        if size >= JSON_CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk = []
+            size = 0
+    chunk.append(end)
+    yield "".join(chunk)
+
+
+def can_render(app: Flask, endpoint: str) -> bool:
+    """Whether `render_page` can write the pages of `endpoint`."""
+    if endpoint == "static":
+        return True
+    view = app.view_functions.get(endpoint)
+    return hasattr(view, "template_context") or hasattr(view, "json_data")
+
+
+def render_page(app: Flask, endpoint: str, values: Mapping[str, Any], filename: str):
+    """Writes the page of `endpoint` to `filename` without a request.
+
+    Static files are copied, views decorated with `templated` are rendered
+    with the shared Jinja environment of the app and the data of views decorated
+    with `json_view` is encoded with `iter_json`. The file is streamed to disk
+    and is the same as the body of the response of the view.
+    """
+    if endpoint == "static":
+        shutil.copyfile(os.path.join(app.static_folder, values["filename"]), filename)
+        return
+
+    with open(filename, "w", encoding="utf-8", newline="") as f:
+        write_page(app, endpoint, values, f)
+
+
+def write_page(app: Flask, endpoint: str, values: Mapping[str, Any], f: TextIO):
+    """Streams the HTML of a `templated` view or the JSON of a `json_view` to `f`."""
+    view = app.view_functions[endpoint]
+    if hasattr(view, "json_data"):
+        with app.app_context():
+            for chunk in iter_json(app, view.json_data(**values)):
+                f.write(chunk)
+        return
+
+    with app.app_context():
+        # Set by `templated`, see `can_render`.
+        context = getattr(view, "template_context")(**values)
+        app.update_template_context(context)
+        with timing.stage("template"):
+            template = app.jinja_env.get_or_select_template(
+                getattr(view, "template_name")
+            )
+            for chunk in template.generate(context):
+                f.write(chunk)
@@ -0,0 +1,129 @@
+import functools
+import gzip
+import io
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from flask import Flask, Response, current_app, request
+from werkzeug.wrappers import Response as BaseResponse
+
+from miniconf.hashing import digest_bytes
+
+GZIP_COMPRESSLEVEL = 6
+DEFAULT_RESPONSE_CACHE_SIZE = 1024
+
+
+def init_app(app: Flask) -> "ResponseCache":
+    """Creates the `ResponseCache` for the views of the app.
+
+    The cache is bypassed if `RESPONSE_CACHE` is false, and its size is
+    `RESPONSE_CACHE_SIZE`.
+    """
+    app.config.setdefault("RESPONSE_CACHE", True)
+    size = app.config.setdefault("RESPONSE_CACHE_SIZE", DEFAULT_RESPONSE_CACHE_SIZE)
+    return ResponseCache(size)
+
+
+class CachedResponse:
+    """The encoded body of a response with its strong ETag.
+
+    The gzip variant is compressed when it is first requested.
+    """
+
+    def __init__(self, body: bytes, mimetype: str):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = digest_bytes(body)
+        self.gzipped: Optional[bytes] = None
+
+    def gzip(self) -> bytes:
+        if self.gzipped is None:
+            buffer = io.BytesIO()
+            with gzip.GzipFile(
+                "", "wb", compresslevel=GZIP_COMPRESSLEVEL, fileobj=buffer, mtime=0
+            ) as f:
+                f.write(self.body)
+            self.gzipped = buffer.getvalue()
+        return self.gzipped
+
+
+class ResponseCache:
+    """The responses of views, by their endpoint, arguments and the data version.
+
+    Views decorated with `cached` are only called once for the same arguments
+    until `invalidate` is called, e.g. after the site data was loaded again.
+    Responses are served with a strong ETag, so that conditional requests get a
+    304, and compressed with gzip if the client accepts it.
+
+    The arguments come from the URL, so at most `maxsize` responses are kept
+    and the least recently used one is evicted first.
+
+    Cached responses are buffered, so streamed ones like those of `json_view`
+    are held in memory in full. They are encoded once per data load instead;
+    disable `RESPONSE_CACHE` to stream them on every request.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.version = 0
+        self.responses: "OrderedDict[Tuple, CachedResponse]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # The dev server handles requests in threads.
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self.responses.clear()
+
+    def _get(self, key: Tuple) -> Optional[CachedResponse]:
+        with self._lock:
+            cached = self.responses.get(key)
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.responses.move_to_end(key)
+            return cached
+
+    def _put(self, key: Tuple, cached: CachedResponse) -> None:
+        with self._lock:
+            self.responses[key] = cached
+            if len(self.responses) > self.maxsize:
+                self.responses.popitem(last=False)
+
+    def cached(self, view: Callable[..., Response]) -> Callable[..., BaseResponse]:
+        @functools.wraps(view)
+        def cached_view(**kwargs):
+            if not current_app.config["RESPONSE_CACHE"]:
+                return view(**kwargs)
+
+            key = (request.endpoint, self.version, tuple(sorted(kwargs.items())))
+            cached = self._get(key)
+            if cached is None:
+                response = view(**kwargs)
+                if response.status_code != 200:
+                    return response
+                # Buffers streamed responses, see above.
+                cached = CachedResponse(response.get_data(), response.mimetype)
+                self._put(key, cached)
+            return _respond(cached)
+
+        return cached_view
+
+
+def _respond(cached: CachedResponse) -> BaseResponse:
+    if request.accept_encodings["gzip"]:
+        response = Response(cached.gzip(), mimetype=cached.mimetype)
+        response.content_encoding = "gzip"
+        # Strong ETags differ between the encodings of the same body.
+        response.set_etag(cached.etag + "-gzip")
+    else:
+        response = Response(cached.body, mimetype=cached.mimetype)
+        response.set_etag(cached.etag)
+    response.vary.add("Accept-Encoding")
+    # Revalidate every time, so that reloaded data is seen right away.
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
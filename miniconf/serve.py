@@ -0,0 +1,116 @@
+import gc
+import os
+import signal
+import time
+from typing import Dict
+
+from flask import Flask
+from werkzeug.serving import make_server
+
+# Seconds that the processes wait for connections and for signals at a time.
+POLL_INTERVAL = 0.5
+
+
+class PreforkServer:
+    """Serves the app from `workers` processes that are forked from this one.
+
+    The site data is loaded once in this process and shared copy-on-write with
+    the workers. The objects that exist before the fork are moved to the
+    permanent generation of the garbage collector, so that its collections in
+    the workers don't write to, and thereby copy, their pages. They are moved
+    back before each fork, so that replaced objects can be collected. The workers
+    accept the connections of one listening socket.
+
+    `restart` replaces the workers by new ones forked from the current state of
+    this process, e.g. after the site data was reloaded. Old workers finish
+    their current request before they exit. SIGHUP restarts the workers too.
+    """
+
+    def __init__(self, app: Flask, host: str, port: int, workers: int):
+        self.server = make_server(host, port, app)
+        # Every worker waits for the socket, but only one gets the connection.
+        self.server.socket.setblocking(False)
+        self.server.timeout = POLL_INTERVAL
+        self.workers = workers
+        self.generation = 0
+        # The generation of the worker with each process id.
+        self.pids: Dict[int, int] = {}
+        self.restart_requested = False
+        self.stopping = False
+
+    def restart(self) -> None:
+        """Requests new workers, can be called from any thread."""
+        self.restart_requested = True
+
+    def serve_forever(self) -> None:
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGHUP, lambda *_: self.restart())
+        print(
+            f"Serving on http://{self.server.host}:{self.server.port} "
+            f"with {self.workers} workers"
+        )
+        self._spawn_workers()
+        try:
+            while not self.stopping:
+                time.sleep(POLL_INTERVAL)
+                self._reap_workers()
+                if self.restart_requested:
+                    self.restart_requested = False
+                    self._restart_workers()
+        finally:
+            for pid in self.pids:
+                os.kill(pid, signal.SIGTERM)
+            while self.pids:
+                pid, _ = os.wait()
+                self.pids.pop(pid, None)
+            self.server.server_close()
+
+    def _stop(self, *_) -> None:
+        self.stopping = True
+
+    def _spawn_workers(self) -> None:
+        # Objects frozen by the last spawn, e.g. of site data that was replaced
+        # since, are only collected after they are unfrozen again.
+        gc.unfreeze()
+        gc.collect()
+        gc.freeze()
+        while sum(g == self.generation for g in self.pids.values()) < self.workers:
+            pid = os.fork()
+            if pid == 0:
+                self._work()
+            self.pids[pid] = self.generation
+
+    def _restart_workers(self) -> None:
+        old = list(self.pids)
+        self.generation += 1
+        self._spawn_workers()
+        for pid in old:
+            os.kill(pid, signal.SIGTERM)
+        print(f"Restarted {len(old)} workers")
+
+    def _reap_workers(self) -> None:
+        while self.pids:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            if self.pids.pop(pid, None) == self.generation and not self.stopping:
+                print(f"Worker {pid} died with status {status}, starting a new one")
+                self._spawn_workers()
+
+    def _work(self) -> None:
+        stopping = False
+
+        def stop(*_):
+            nonlocal stopping
+            stopping = True
+
+        # Ctrl+C reaches all processes, but the workers are stopped by this one.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGHUP, signal.SIG_DFL)
+        try:
+            while not stopping:
+                self.server.handle_request()
+        finally:
+            os._exit(0)  # pylint: disable=protected-access
@@ -0,0 +1,84 @@
+import glob
+import os
+import pickle
+import sys
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from miniconf.hashing import digest_bytes, digest_files
+
+# Relative to the root path of the app.
+SNAPSHOT_DIRECTORY = os.path.join(".cache", "sitedata")
+# Snapshots of other sitedata folders or of older data are kept for a while,
+# e.g. for `--batch` builds or switching between branches.
+KEEP_SNAPSHOTS = 8
+
+# The code that builds the site data from the files.
+SOURCE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def snapshot_key(files: Iterable[str]) -> str:
+    """The digest of the sitedata `files`, the `miniconf` source and Python.
+
+    Snapshots are only valid for the same files, the same code that built them
+    and the same interpreter, which has to unpickle them.
+    """
+    sources = glob.glob(os.path.join(SOURCE_DIRECTORY, "*.py"))
+    parts = [
+        sys.version,
+        str(pickle.HIGHEST_PROTOCOL),
+        digest_files(files),
+        digest_files(sources),
+    ]
+    return digest_bytes("\n".join(parts).encode())
+
+
+def load_snapshot(
+    directory: str, key: str
+) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """The `site_data` and `by_uid` of the snapshot with `key`, if there is one."""
+    path = os.path.join(directory, f"{key}.pickle")
+    try:
+        with open(path, "rb") as f:
+            site_data, by_uid = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:  # pylint: disable=broad-except
+        print(f"WARNING: ignoring the broken snapshot {path}: {e}")
+        return None
+    # Mark the snapshot as recently used, see `save_snapshot`.
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        # Another process has pruned it meanwhile.
+        pass
+    return site_data, by_uid
+
+
+def save_snapshot(
+    directory: str, key: str, site_data: Dict[str, Any], by_uid: Dict[str, Any]
+) -> None:
+    """Writes a snapshot and removes all but the `KEEP_SNAPSHOTS` latest ones."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{key}.pickle")
+    # Another process may read the snapshot while it is written.
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        # Both in one pickle, so that they still share the same objects.
+        pickle.dump((site_data, by_uid), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, path)
+
+    # Concurrent builds sharing the directory may prune the same snapshots.
+    snapshots = sorted(glob.glob(os.path.join(directory, "*.pickle")), key=_mtime)
+    for old in snapshots[:-KEEP_SNAPSHOTS]:
+        try:
+            os.remove(old)
+        except FileNotFoundError:
+            pass
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        # Removed already, so it sorts first among the snapshots to remove.
+        return 0.0
@@ -0,0 +1,116 @@
+import os
+import uuid
+from typing import Any, Callable, Dict, List
+
+from flask import Flask
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from miniconf.hashing import digest_data
+
+# Relative to the root path of the app.
+BYTECODE_CACHE_DIRECTORY = os.path.join(".cache", "jinja")
+
+
+def init_app(app: Flask) -> None:
+    """Sets up the caches of the Jinja environment of the app.
+
+    The compiled templates are stored in `TEMPLATE_CACHE_DIR`, so that they are
+    shared by all freezes and worker processes, and the `cache` tag of
+    `FragmentCacheExtension` is registered.
+    """
+    directory = app.config.setdefault(
+        "TEMPLATE_CACHE_DIR", os.path.join(app.root_path, BYTECODE_CACHE_DIRECTORY)
+    )
+    app.jinja_env.bytecode_cache = BytecodeCache(directory)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+
+
+class BytecodeCache(FileSystemBytecodeCache):
+    """Creates its directory when the first compiled template is stored.
+
+    So that importing the app doesn't write to the working tree.
+    """
+
+    def dump_bytecode(self, bucket):
+        os.makedirs(self.directory, exist_ok=True)
+        super().dump_bytecode(bucket)
+
+
+class FragmentCache:
+    """The rendered fragments of the `cache` tag, by their template and key."""
+
+    def __init__(self):
+        self.fragments: Dict[str, Markup] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, render: Callable[[], Markup]) -> Markup:
+        # The cache may be cleared by another thread, e.g. on a reload.
+        fragment = self.fragments.get(key)
+        if fragment is None:
+            self.misses += 1
+            fragment = self.fragments[key] = render()
+        else:
+            self.hits += 1
+        return fragment
+
+    def clear(self) -> None:
+        self.fragments.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class FragmentCacheExtension(Extension):
+    """Renders the body of `{% cache "name", data, ... %}...{% endcache %}` once.
+
+    The fragment is reused for every page that has the same values for the
+    expressions after the tag, i.e. they must be all data that the body reads.
+    The fragments are kept in the `fragment_cache` of the environment, which
+    must be cleared if anything else that they depend on changes, e.g. the
+    `STATIC_ASSET_MAP` behind `static_url`.
+    """
+
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=FragmentCache())
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        # Fragments of a template that was changed and compiled again, e.g. by
+        # the debug server, are not reused.
+        compilation = f"{parser.name}:{lineno}:{uuid.uuid4().hex}"
+        call = self.call_method(
+            "_render_fragment", [nodes.Const(compilation), nodes.List(key)]
+        )
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render_fragment(
+        self, compilation: str, key: List[Any], caller: Callable[[], Markup]
+    ) -> Markup:
+        digest = digest_data(key)
+        fragment_cache = getattr(self.environment, "fragment_cache")
+        return fragment_cache.get(f"{compilation}:{digest}", caller)
+
+
+def precompile_templates(app: Flask) -> int:
+    """Compiles all templates into the environment of the app.
+
+    E.g. before forking processes that render them, which then share the
+    compiled templates. Returns the number of templates.
+    """
+    names = app.jinja_env.list_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def clear_fragment_cache(app: Flask) -> None:
+    getattr(app.jinja_env, "fragment_cache").clear()
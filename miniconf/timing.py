@@ -0,0 +1,69 @@
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# The stage times of the page that is currently rendered, if they are recorded.
+_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("stages", default=None)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Adds the time spent in the block to the stage `name` of the current page.
+
+    This is a no-op unless the page is rendered inside `record_stages`.
+    """
+    stages = _stages.get()
+    if stages is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages[name] = stages.get(name, 0.0) + time.perf_counter() - start
+
+
+@contextmanager
+def record_stages() -> Iterator[Dict[str, float]]:
+    """Records the seconds spent in each `stage` while rendering a page."""
+    stages, token = start_recording()
+    try:
+        yield stages
+    finally:
+        stop_recording(token)
+
+
+def start_recording() -> Tuple[Dict[str, float], Token]:
+    """Like `record_stages`, for pages that end in another function.
+
+    E.g. a response whose body is streamed after the view returned. The token
+    must be passed to `stop_recording` in the same thread.
+    """
+    stages: Dict[str, float] = {}
+    return stages, _stages.set(stages)
+
+
+def stop_recording(token: Token) -> None:
+    _stages.reset(token)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """The `q`-th percentile (0 < q <= 100) of `values` by the nearest rank."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(seconds: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(seconds),
+        "total": sum(seconds),
+        "p50": percentile(seconds, 50),
+        "p95": percentile(seconds, 95),
+        "max": max(seconds, default=0.0),
+    }
@@ -0,0 +1,55 @@
+import os
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List
+
+from miniconf.load_site_data import sitedata_files
+
+
+class SiteDataWatcher(threading.Thread):
+    """Calls `on_change(names)` with the sitedata files that changed.
+
+    The modification times of the files under `site_data_path` are polled every
+    `interval` seconds, like the reloader of Werkzeug does, but the process keeps
+    running. Exceptions of `on_change` are printed and the files are watched
+    further, e.g. until a YAML file that is being edited is valid again.
+    """
+
+    def __init__(
+        self,
+        site_data_path: str,
+        on_change: Callable[[List[str]], None],
+        interval: float = 0.5,
+    ):
+        super().__init__(name="sitedata-watcher", daemon=True)
+        self.site_data_path = site_data_path
+        self.on_change = on_change
+        self.interval = interval
+
+    def run(self):
+        mtimes = self._mtimes()
+        while True:
+            time.sleep(self.interval)
+            current = self._mtimes()
+            changed = sorted(
+                name
+                for name in set(mtimes) | set(current)
+                if mtimes.get(name) != current.get(name)
+            )
+            mtimes = current
+            if not changed:
+                continue
+            try:
+                self.on_change(changed)
+            except Exception:  # pylint: disable=broad-except
+                traceback.print_exc()
+
+    def _mtimes(self) -> Dict[str, float]:
+        mtimes = {}
+        for name, path in sitedata_files(self.site_data_path).items():
+            try:
+                mtimes[name] = os.stat(path).st_mtime
+            except FileNotFoundError:
+                continue
+        return mtimes
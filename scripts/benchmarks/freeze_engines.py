@@ -0,0 +1,63 @@
+"""Compares the pages per second of the freeze engines on the real sitedata.
+
+Only pages that both engines can render are timed. Run from the repository root:
+
+    python -m scripts.benchmarks.freeze_engines [--endpoint paper] [--repeat 3]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import main
+from miniconf.freeze import freeze_target, iter_targets
+from miniconf.load_site_data import load_site_data
+from miniconf.render import can_render
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sitedata", default="sitedata")
+    parser.add_argument("--endpoint", help="Only render the pages of this endpoint")
+    parser.add_argument("--repeat", type=int, default=3)
+    return parser.parse_args()
+
+
+def pages_per_second(freezer, engine, targets) -> float:
+    with tempfile.TemporaryDirectory() as destination:
+        main.app.config["FREEZER_DESTINATION"] = destination
+        for target in targets:
+            path = os.path.join(destination, target.url.lstrip("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        start = time.perf_counter()
+        for target in targets:
+            freeze_target(freezer, target, engine)
+        return len(targets) / (time.perf_counter() - start)
+
+
+def run():
+    args = parse_arguments()
+    load_site_data(args.sitedata, main.site_data, main.by_uid)
+    freezer = main.create_freezer()
+
+    targets = [
+        target
+        for target in iter_targets(freezer)
+        if target.endpoint not in {None, "static"}
+        and can_render(main.app, target.endpoint)
+        and (args.endpoint is None or target.endpoint == args.endpoint)
+    ]
+    print(f"Rendering {len(targets)} pages, best of {args.repeat} runs")
+
+    results = {}
+    for engine in ["flask", "jinja"]:
+        results[engine] = max(
+            pages_per_second(freezer, engine, targets) for _ in range(args.repeat)
+        )
+        print(f"{engine:>6}: {results[engine]:8.1f} pages/s")
+    print(f"speedup: {results['jinja'] / results['flask']:.2f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,82 @@
+"""Checks that `import main` stays within its import time budget.
+
+`python main.py --render` should start quickly, so modules that are only needed
+to build or to deploy the site must be imported when they are used. Run from
+the repository root:
+
+    python -m scripts.benchmarks.import_time [--budget-ms 500] [--repeat 3]
+"""
+import argparse
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+# Modules that `main` must not import at startup.
+DEFERRED_MODULES = [
+    "boto3",
+    "brotli",
+    "flask_frozen",
+    "jsons",
+    "miniconf.compress",
+    "miniconf.deploy",
+    "miniconf.freeze",
+]
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--budget-ms", type=float, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    return parser.parse_args()
+
+
+def import_times(module: str) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """The cumulative import time of each top-level package and of each module.
+
+    The times are in microseconds as reported by `python -X importtime`.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stderr=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    )
+    packages: Dict[str, int] = {}
+    modules: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = int(cumulative)
+        # Top-level imports are not indented.
+        if not name.startswith("  "):
+            packages[name.strip()] = int(cumulative)
+    return packages, modules
+
+
+def run():
+    args = parse_arguments()
+    runs = [import_times(args.module) for _ in range(args.repeat)]
+    packages, modules = min(runs, key=lambda run: run[0][args.module])
+    total = packages[args.module] / 1000
+
+    print(f"import {args.module}: {total:.0f} ms (best of {args.repeat} runs)")
+    slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)
+    for name, microseconds in slowest[1 : args.top + 1]:
+        print(f"{microseconds / 1000:8.1f} ms  {name}")
+
+    failed = False
+    imported = [name for name in DEFERRED_MODULES if name in modules]
+    if imported:
+        print(f"FAIL: {args.module} imports {', '.join(imported)} at startup")
+        failed = True
+    if total > args.budget_ms:
+        print(f"FAIL: {total:.0f} ms exceeds the budget of {args.budget_ms:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    run()
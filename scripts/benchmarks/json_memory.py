@@ -0,0 +1,61 @@
+"""Compares the peak memory of `jsonify` and of the streamed `/papers.json`.
+
+The papers are repeated `--copies` times to show that the peak of the streamed
+response doesn't grow with the number of papers. Run from the repository root:
+
+    python -m scripts.benchmarks.json_memory [--copies 1 4 16]
+"""
+import argparse
+import tracemalloc
+
+from flask import jsonify
+
+import main
+from miniconf.load_site_data import load_site_data
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sitedata", default="sitedata")
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 4, 16])
+    return parser.parse_args()
+
+
+def peak_mb(request) -> float:
+    tracemalloc.start()
+    try:
+        request()
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def jsonify_papers():
+    with main.app.app_context():
+        jsonify(main.site_data["papers"]).get_data()
+
+
+def stream_papers():
+    response = main.app.test_client().get("/papers.json", buffered=False)
+    for _ in response.response:
+        pass
+    response.close()
+
+
+def run():
+    args = parse_arguments()
+    load_site_data(args.sitedata, main.site_data, main.by_uid)
+    main.app.config["RESPONSE_CACHE"] = False
+    papers = main.site_data["papers"]
+
+    print(f"{'papers':>8} {'jsonify MB':>11} {'streamed MB':>12}")
+    for copies in args.copies:
+        main.site_data["papers"] = papers * copies
+        print(
+            f"{len(papers) * copies:8d} {peak_mb(jsonify_papers):11.1f} "
+            f"{peak_mb(stream_papers):12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,48 @@
+"""Reports the parse time of each sitedata file and the time of `load_site_data`.
+
+Run from the repository root:
+
+    python -m scripts.benchmarks.load_site_data [--jobs 1 4] [--repeat 3]
+"""
+import argparse
+import contextlib
+import io
+import os
+import time
+
+from miniconf.load_site_data import YAML_LOADER, load_site_data
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sitedata", default="sitedata")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, os.cpu_count()])
+    parser.add_argument("--repeat", type=int, default=3)
+    return parser.parse_args()
+
+
+def load(sitedata: str, jobs: int):
+    parse_times = {}
+    start = time.perf_counter()
+    # Keep the warnings about the data out of the report.
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_site_data(sitedata, {}, {}, jobs=jobs, parse_times=parse_times)
+    return time.perf_counter() - start, parse_times
+
+
+def run():
+    args = parse_arguments()
+    print(f"YAML loader: {YAML_LOADER.__name__}")
+
+    _, parse_times = load(args.sitedata, 1)
+    for name, seconds in sorted(parse_times.items(), key=lambda item: -item[1]):
+        print(f"{seconds * 1000:8.1f} ms  {name}")
+    print(f"{sum(parse_times.values()) * 1000:8.1f} ms  parsing all files")
+
+    for jobs in args.jobs:
+        best = min(load(args.sitedata, jobs)[0] for _ in range(args.repeat))
+        print(f"load_site_data with {jobs} jobs: {best * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,99 @@
+"""Compares the peak memory of building the papers from lists and from streams.
+
+The former pipeline parsed each paper CSV file into a list of rows and built
+the papers from their concatenation; `paper_rows` streams them from the files
+instead. The rows are repeated `--copies` times, with new ids, to show how
+the peak grows with the proceedings. Run from the repository root:
+
+    python -m scripts.benchmarks.papers_memory [--copies 1 4 10]
+"""
+import argparse
+import contextlib
+import csv
+import io
+import os
+import tempfile
+import tracemalloc
+
+from miniconf.load_site_data import (
+    CSVRows,
+    build_papers,
+    load_site_data,
+    paper_rows,
+    sitedata_files,
+)
+
+PAPER_FILES = ["main_papers", "demo_papers", "findings_papers"]
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sitedata", default="sitedata")
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 4, 10])
+    return parser.parse_args()
+
+
+def write_copies(source: str, target: str, copies: int) -> None:
+    with open(source) as f:
+        rows = list(csv.DictReader(f))
+    with open(target, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        for copy in range(copies):
+            for row in rows:
+                uid = row["UID"] if copy == 0 else f"{row['UID']}-{copy}"
+                writer.writerow({**row, "UID": uid})
+
+
+def peak_mb(build) -> float:
+    tracemalloc.start()
+    try:
+        # Keep the warnings about the data out of the report.
+        with contextlib.redirect_stdout(io.StringIO()):
+            build()
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def run():
+    args = parse_arguments()
+    files = sitedata_files(args.sitedata)
+    site_data = {}
+    load_site_data(args.sitedata, site_data, {}, ["config", "paper_sessions"])
+    inputs = dict(
+        paper_sessions=site_data["paper_sessions"],
+        paper_recs={},
+        paper_images_path=site_data["config"]["paper_images_path"],
+    )
+
+    print(f"{'papers':>8} {'lists MB':>9} {'streamed MB':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for copies in args.copies:
+            paths = {
+                name: os.path.join(directory, f"{name}.csv") for name in PAPER_FILES
+            }
+            for name, path in paths.items():
+                write_copies(files[name], path, copies)
+
+            def build_from_lists():
+                rows = {}
+                for name, path in paths.items():
+                    with open(path) as f:
+                        rows[name] = list(csv.DictReader(f))
+                papers = list(paper_rows(rows))
+                return build_papers(raw_papers=papers, **inputs)
+
+            def build_from_streams():
+                rows = {name: CSVRows(path) for name, path in paths.items()}
+                return build_papers(raw_papers=paper_rows(rows), **inputs)
+
+            count = sum(1 for path in paths.values() for _ in CSVRows(path))
+            print(
+                f"{count:8d} {peak_mb(build_from_lists):9.1f} "
+                f"{peak_mb(build_from_streams):12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    run()
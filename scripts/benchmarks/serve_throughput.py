@@ -0,0 +1,87 @@
+"""Compares the requests per second of the dev server and of `--serve`.
+
+Each server is started on the real sitedata and requested by `--clients`
+processes for `--duration` seconds per URL. Run from the repository root:
+
+    python -m scripts.benchmarks.serve_throughput [--workers 4] [--clients 8]
+"""
+import argparse
+import multiprocessing
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import List
+
+URLS = ["/paper_main.1004.html", "/papers.json"]
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--port", type=int, default=5050)
+    parser.add_argument("--url", nargs="+", default=URLS)
+    return parser.parse_args()
+
+
+def start_server(arguments: List[str], port: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "main.py", "--port", str(port), *arguments],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(600):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/index.html").read()
+            return server
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError(f"main.py {' '.join(arguments)} didn't start")
+
+
+def request_until(url: str, deadline: float) -> int:
+    requests = 0
+    while time.time() < deadline:
+        urllib.request.urlopen(url).read()
+        requests += 1
+    return requests
+
+
+def requests_per_second(url: str, clients: int, duration: float) -> float:
+    deadline = time.time() + duration
+    with multiprocessing.Pool(clients) as pool:
+        requests = pool.starmap(request_until, [(url, deadline)] * clients)
+    return sum(requests) / duration
+
+
+def run():
+    args = parse_arguments()
+    servers = {
+        "dev server": [],
+        f"--serve --workers {args.workers}": [
+            "--serve",
+            "--workers",
+            str(args.workers),
+        ],
+    }
+    print(f"{args.clients} clients, {args.duration:.0f}s per URL")
+    for name, arguments in servers.items():
+        server = start_server(arguments, args.port)
+        try:
+            for url in args.url:
+                rate = requests_per_second(
+                    f"http://127.0.0.1:{args.port}{url}", args.clients, args.duration
+                )
+                print(f"{name:>20}  {url:<24} {rate:8.1f} requests/s")
+        finally:
+            server.send_signal(signal.SIGINT)
+            server.wait()
+
+
+if __name__ == "__main__":
+    run()
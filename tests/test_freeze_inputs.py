@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DIGEST_HOME_INPUTS = """
+import contextlib, io
+import main
+from miniconf.hashing import digest_data
+from miniconf.load_site_data import load_site_data
+
+with contextlib.redirect_stdout(io.StringIO()):
+    load_site_data("sitedata", main.site_data, main.by_uid, jobs=1)
+print(digest_data(main.freeze_inputs("home", {})))
+"""
+
+
+def digest_in_new_process(hash_seed: str) -> str:
+    env = dict(os.environ, PYTHONHASHSEED=hash_seed)
+    result = subprocess.run(
+        [sys.executable, "-c", DIGEST_HOME_INPUTS],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.PIPE,
+        check=True,
+    )
+    return result.stdout.decode().strip()
+
+
+def test_freeze_inputs_are_the_same_in_every_process():
+    # Sets are ordered by the hashes of their strings, which differ between
+    # processes unless PYTHONHASHSEED is fixed.
+    assert digest_in_new_process("1") == digest_in_new_process("2")
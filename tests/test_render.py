@@ -0,0 +1,35 @@
+import json
+
+import pytest
+from flask import Flask, jsonify
+
+from miniconf import render
+
+DATA = [
+    {"id": f"main.{i}", "title": f"Paper {i} é", "authors": ["A", "B"], "n": i}
+    for i in range(3000)
+]
+
+
+@pytest.mark.parametrize("debug", [False, True])
+@pytest.mark.parametrize("data", [DATA, tuple(DATA), [], {"papers": DATA[:3]}, 1])
+def test_iter_json_is_the_same_as_jsonify(data, debug):
+    app = Flask(__name__)
+    app.debug = debug
+    with app.app_context():
+        chunks = list(render.iter_json(app, data))
+        expected = jsonify(data).get_data(as_text=True)
+    assert "".join(chunks) == expected
+    assert json.loads("".join(chunks)) == json.loads(json.dumps(data))
+
+
+def test_iter_json_yields_chunks_of_the_chunk_size():
+    app = Flask(__name__)
+    with app.app_context():
+        chunks = list(render.iter_json(app, DATA))
+    assert len(chunks) > 1
+    assert all(len(chunk) >= render.JSON_CHUNK_SIZE for chunk in chunks[:-1])
+    assert (
+        "".join(chunks)
+        == json.dumps(DATA, separators=(",", ":"), sort_keys=True) + "\n"
+    )
@@ -0,0 +1,66 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+
+import pytest
+import yaml
+from flask_frozen import Freezer
+
+import main
+from miniconf.freeze import FAILURES_FILENAME, FreezeError, freeze
+from miniconf.load_site_data import load_site_data
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def dangling_publication(tmp_path, monkeypatch):
+    """Loads the sitedata with an unknown publication of the first sponsor."""
+    sitedata = str(tmp_path / "sitedata")
+    shutil.copytree(os.path.join(ROOT, "sitedata"), sitedata)
+    filename = os.path.join(sitedata, "sponsors.yml")
+    with open(filename) as f:
+        sponsors = yaml.safe_load(f)
+    sponsors[0]["publications"] = ["main.unknown"]
+    with open(filename, "w") as f:
+        yaml.safe_dump(sponsors, f)
+
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr(main, "site_data", {})
+    monkeypatch.setattr(main, "by_uid", {})
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_site_data(sitedata, main.site_data, main.by_uid, jobs=1)
+    return "_".join(sponsors[0]["name"].lower().split())
+
+
+def test_unknown_publication_only_fails_the_sponsor_page(
+    dangling_publication, tmp_path, monkeypatch
+):
+    monkeypatch.setitem(main.app.config, "FREEZER_DESTINATION", str(tmp_path / "build"))
+    monkeypatch.setitem(main.app.config, "FREEZER_REMOVE_EXTRA_FILES", False)
+    freezer = Freezer(main.app, with_static_files=False, with_no_argument_rules=False)
+
+    @freezer.register_generator
+    def sponsor_pages():
+        for page in main.generator():
+            # The JSON exports are yielded as URLs.
+            if page[0] == "sponsor":
+                yield page
+
+    with pytest.raises(FreezeError) as error:
+        freeze(freezer, main.freeze_inputs, keep_going=True)
+
+    failed_url = f"/sponsor_{dangling_publication}.html"
+    assert [failure["url"] for failure in error.value.failures] == [failed_url]
+    with open(os.path.join(freezer.root, FAILURES_FILENAME)) as f:
+        assert [failure["url"] for failure in json.load(f)] == [failed_url]
+    frozen = [name for name in os.listdir(freezer.root) if name.startswith("sponsor_")]
+    pages = [
+        sponsor
+        for sponsor in main.site_data["sponsors"]
+        if "landingpage" not in sponsor
+    ]
+    assert failed_url[1:] not in frozen
+    assert len(frozen) == len(pages) - 1